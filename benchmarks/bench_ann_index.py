@@ -0,0 +1,92 @@
+# benchmarks/bench_ann_index.py
+#
+# Compares the ANN index types against the exact flat index: recall@7 (the k that
+# src/ui/app.py retrieves) and p50/p99 single-query latency.
+#
+# Usage:
+#   python benchmarks/bench_ann_index.py                 # vectors from the built knowledge base
+#   python benchmarks/bench_ann_index.py --synthetic 100000 --dim 768
+
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from src.vector_store.ann_index import build_faiss_index
+from src.vector_store.disk_store import INDEX_FILENAME
+
+K = 7
+
+
+def load_store_vectors(config: dict) -> np.ndarray:
+    """Reconstructs the raw vectors from the knowledge base's (flat) index."""
+    index_path = os.path.join(PROJECT_ROOT, config['data']['vector_store_path'], INDEX_FILENAME)
+    index = faiss.read_index(index_path)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def make_queries(vectors: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Held-out style queries: corpus vectors with noise, so the nearest neighbour isn't trivially itself."""
+    picks = vectors[rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)]
+    noise = rng.normal(scale=vectors.std() * 0.5, size=picks.shape).astype(np.float32)
+    return picks + noise
+
+
+def measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray) -> tuple[float, float, float]:
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], K)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found[0]) & set(expected))
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return hits / (len(queries) * K), p50, p99
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    if args.synthetic:
+        vectors = rng.normal(size=(args.synthetic, args.dim)).astype(np.float32)
+    else:
+        import yaml
+        with open(os.path.join(PROJECT_ROOT, "config", "settings.yaml"), 'r') as f:
+            vectors = load_store_vectors(yaml.safe_load(f))
+    queries = make_queries(vectors, args.queries, rng)
+
+    print(f"Building exact reference over {len(vectors)} vectors of dimension {vectors.shape[1]}...")
+    flat = build_faiss_index(vectors, {'index_type': 'flat'})
+    _, truth = flat.search(queries, K)
+
+    variants = [
+        ("flat", {'index_type': 'flat'}),
+        (f"ivf nprobe={args.nprobe}", {'index_type': 'ivf', 'ivf_nprobe': args.nprobe}),
+        (f"hnsw efSearch={args.ef_search}", {'index_type': 'hnsw', 'hnsw_ef_search': args.ef_search}),
+        (f"ivfpq nprobe={args.nprobe}", {'index_type': 'ivfpq', 'ivf_nprobe': args.nprobe}),
+    ]
+
+    print(f"\n{'index':<24} {'build s':>8} {'recall@7':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, vector_store_config in variants:
+        start = time.perf_counter()
+        index = flat if vector_store_config['index_type'] == 'flat' else build_faiss_index(vectors, vector_store_config)
+        build_seconds = time.perf_counter() - start
+        recall, p50, p99 = measure(index, queries, truth)
+        print(f"{name:<24} {build_seconds:>8.2f} {recall:>9.3f} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--synthetic', type=int, default=0, help="use N random vectors instead of the knowledge base")
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--nprobe', type=int, default=8)
+    parser.add_argument('--ef-search', type=int, default=64)
+    run(parser.parse_args())
@@ -0,0 +1,97 @@
+# benchmarks/bench_chunker.py
+#
+# Compares the recursive character splitter with the structure-aware chunker on the
+# bundled data/pdf corpus: chunk count, characters (and estimated tokens) sent to the
+# embedding model, and retrieval hit rate@7.
+#
+# A query is a hit when one of the top 7 chunks contains its expected answer text.
+# Retrieval uses the BM25 lexical index so the comparison runs offline; it measures
+# whether the answer ends up in the same chunk as the words that find it.
+#
+# Usage:
+#   python benchmarks/bench_chunker.py --queries eval.jsonl   # lines of {"query": ..., "expected": ...}
+#   python benchmarks/bench_chunker.py                        # queries derived from section headings
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from bench_ingestion import load_config
+from src.ingestion.pdf_loader import load_and_process_pdfs
+from src.vector_store.chunker import HEADING_PREFIX, get_text_splitter
+from src.vector_store.embedding_scheduler import estimate_tokens
+from src.vector_store.lexical_index import LexicalIndex, build_lexical_index
+
+K = 7
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def heading_queries(documents, limit: int) -> list[dict]:
+    """One query per section: the heading as query, the start of its body as expected text."""
+    queries = []
+    for document in documents:
+        lines = [line.strip() for line in document.page_content.split("\n")]
+        for i, line in enumerate(lines):
+            if not line.startswith(HEADING_PREFIX):
+                continue
+            body = next((following for following in lines[i + 1:] if following), "")
+            if len(body) >= 40 and not body.startswith(HEADING_PREFIX):
+                queries.append({"query": line[len(HEADING_PREFIX):], "expected": body[:80]})
+    return queries[:limit]
+
+
+def load_queries(path: str) -> list[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def hit_rate(chunks: list[str], queries: list[dict], workdir: str, name: str) -> float:
+    db_path = os.path.join(workdir, f"{name}.sqlite")
+    build_lexical_index(((str(i), chunk) for i, chunk in enumerate(chunks)), db_path)
+    index = LexicalIndex(db_path)
+    normalized = [_normalize(chunk) for chunk in chunks]
+    hits = 0
+    for query in queries:
+        expected = _normalize(query["expected"])
+        if any(expected in normalized[int(doc_id)] for doc_id, _ in index.search(query["query"], K)):
+            hits += 1
+    index.close()
+    return hits / len(queries) if queries else 0.0
+
+
+def run(args):
+    config = load_config()
+    config.setdefault('ingestion', {})['process_images'] = False
+    documents = load_and_process_pdfs(os.path.join(PROJECT_ROOT, config['data']['pdf_path']), config)
+    queries = load_queries(args.queries) if args.queries else heading_queries(documents, args.max_queries)
+    print(f"Loaded {len(documents)} pages and {len(queries)} queries.")
+
+    vector_store_config = dict(config.get('vector_store') or {})
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for chunker in ("recursive", "structure"):
+            splitter = get_text_splitter({**vector_store_config, 'chunker': chunker})
+            chunks = [chunk.page_content for document in documents for chunk in splitter.split_documents([document])]
+            chars = sum(len(chunk) for chunk in chunks)
+            tokens = sum(estimate_tokens(chunk) for chunk in chunks)
+            results.append((chunker, len(chunks), chars, tokens, hit_rate(chunks, queries, workdir, chunker)))
+
+    print(f"\n{'chunker':<10} {'chunks':>7} {'chars':>10} {'~tokens':>9} {'hit@7':>7}")
+    for chunker, count, chars, tokens, rate in results:
+        print(f"{chunker:<10} {count:>7} {chars:>10} {tokens:>9} {rate:>7.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', help="JSONL file of {\"query\": ..., \"expected\": ...} lines")
+    parser.add_argument('--max-queries', type=int, default=500)
+    run(parser.parse_args())
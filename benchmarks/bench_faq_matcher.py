@@ -0,0 +1,113 @@
+# benchmarks/bench_faq_matcher.py
+#
+# Per-query FAQ lookup latency of the trigram-indexed FaqMatcher against the previous
+# full scan (process.extractOne over every question), on synthetic FAQ rows. Also
+# reports how often the indexed lookup returns the same entry as the full scan.
+#
+# Usage: python benchmarks/bench_faq_matcher.py [--rows 100000] [--queries 2000]
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from src.bot_engine.faq_matcher import FaqMatcher
+
+WORDS = (
+    "how can i my the a to of for ticket booking refund cancel train pnr status waitlist tatkal "
+    "payment failed account password reset login otp seat berth coach chart prepared senior citizen "
+    "concession e-ticket i-ticket change boarding station journey date name passenger id proof "
+    "counter agent wallet upi card bank charges deducted money when will get what is does"
+).split()
+
+
+SYLLABLES = "ba be bi bo bu ca ce ci co da de di do fa fe fi ga go ha he ka ke ko la le li lo ma me mi mo na ne ni no pa pe pi po ra re ri ro sa se si so ta te ti to va ve vi za".split()
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list[str]:
+    """The domain words plus pseudo-words, so the corpus has a realistic long tail of rare terms."""
+    words = set(WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words, key=lambda word: (word not in WORDS, word))
+
+
+def make_questions(count: int, vocabulary: list[str], rng: random.Random) -> list[str]:
+    # Zipf-like word frequencies: the domain words are common, most pseudo-words rare
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return [
+        " ".join(rng.choices(vocabulary, weights, k=rng.randint(5, 14))).capitalize() + "?"
+        for _ in range(count)
+    ]
+
+
+def perturb(text: str, rng: random.Random) -> str:
+    """A user-style rewording: changed case, a dropped '?', and a typo or two."""
+    chars = list(text.lower().rstrip("?"))
+    for _ in range(rng.randint(0, 2)):
+        chars[rng.randrange(len(chars))] = rng.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    latencies = sorted(latencies)
+    return (latencies[len(latencies) // 2] * 1000,
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000)
+
+
+def run(args):
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    questions = make_questions(args.rows, vocabulary, rng)
+    answers = [f"answer {i}" for i in range(args.rows)]
+    # Half rewordings of existing questions, half unrelated queries that should miss
+    queries = [perturb(rng.choice(questions), rng) for _ in range(args.queries // 2)]
+    queries += [" ".join(rng.choices(vocabulary, k=rng.randint(3, 10))) for _ in range(args.queries - len(queries))]
+
+    start = time.perf_counter()
+    matcher = FaqMatcher(questions, answers, score_cutoff=args.cutoff)
+    print(f"Built index over {args.rows} rows in {time.perf_counter() - start:.2f}s")
+
+    latencies, indexed = [], []
+    for query in queries:
+        start = time.perf_counter()
+        match = matcher.match(query)
+        latencies.append(time.perf_counter() - start)
+        indexed.append(match)
+    p50, p99 = percentiles(latencies)
+
+    # The full scan is slow at this size, so it only runs on a sample
+    sample = list(range(0, len(queries), max(1, len(queries) // args.scan_queries)))
+    scan_latencies, agree = [], 0
+    for i in sample:
+        start = time.perf_counter()
+        best = process.extractOne(queries[i], questions, scorer=fuzz.WRatio, processor=default_process,
+                                  score_cutoff=args.cutoff)
+        scan_latencies.append(time.perf_counter() - start)
+        # Rows with the same score are equally good answers, so compare scores rather than rows
+        agree += (best[1] if best else None) == (indexed[i].score if indexed[i] else None)
+    scan_p50, scan_p99 = percentiles(scan_latencies)
+
+    print(f"\n{'lookup':<14} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'indexed':<14} {p50:>8.3f} {p99:>8.3f}")
+    print(f"{'full scan':<14} {scan_p50:>8.3f} {scan_p99:>8.3f}")
+    print(f"\nIndexed lookup agrees with the full scan on {agree}/{len(sample)} sampled queries; "
+          f"{sum(match is not None for match in indexed)}/{len(queries)} queries matched.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--scan-queries', type=int, default=50)
+    parser.add_argument('--cutoff', type=float, default=90)
+    run(parser.parse_args())
@@ -0,0 +1,56 @@
+# benchmarks/bench_ingestion.py
+#
+# Measures wall-clock time of load_and_process_pdfs on the bundled data/pdf corpus
+# for an increasing number of worker processes.
+#
+# Usage: python benchmarks/bench_ingestion.py [max_workers]
+
+import copy
+import os
+import sys
+import time
+import yaml
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from src.ingestion.pdf_loader import load_and_process_pdfs
+
+
+def load_config() -> dict:
+    """Uses config/settings.yaml when present, otherwise the bundled sample."""
+    for name in ("settings.yaml", "settings.sample.yaml"):
+        path = os.path.join(PROJECT_ROOT, "config", name)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return yaml.safe_load(f)
+    raise FileNotFoundError("No settings file found in config/")
+
+
+def run(max_workers: int):
+    base_config = load_config()
+    pdf_path = os.path.join(PROJECT_ROOT, base_config['data']['pdf_path'])
+
+    results = []
+    for workers in range(1, max_workers + 1):
+        config = copy.deepcopy(base_config)
+        config.setdefault('ingestion', {})['workers'] = workers
+        # Image descriptions are network bound and would dominate the timing
+        config['ingestion']['process_images'] = False
+        # Every run must partition the PDF; a warm page cache would time only cache reads
+        config['ingestion']['cache_dir'] = None
+
+        start = time.perf_counter()
+        documents = load_and_process_pdfs(pdf_path, config)
+        elapsed = time.perf_counter() - start
+        results.append((workers, elapsed, len(documents)))
+
+    baseline = results[0][1]
+    print("\n--- Ingestion scaling ---")
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8} {'docs':>6}")
+    for workers, elapsed, doc_count in results:
+        print(f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>7.2f}x {doc_count:>6}")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1))
@@ -0,0 +1,104 @@
+# benchmarks/replay_faq.py
+#
+# Replays logged queries through the FAQ tiers and reports how many are resolved
+# without an LLM call: by the exact and fuzzy tiers, and with the semantic tier at a
+# range of similarity thresholds. Use it to calibrate faq.semantic_threshold.
+#
+# Replay file: JSONL lines of {"query": ..., "expected": <FAQ question text, or null
+# when the query should go to the documents>}. "expected" may be omitted, in which
+# case only coverage (not precision) is reported for that query.
+#
+# Usage: python benchmarks/replay_faq.py replay.jsonl [--target-precision 0.95]
+
+import argparse
+import json
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PROJECT_ROOT)
+
+from bench_ingestion import load_config
+from src.bot_engine.faq_matcher import get_faq_matcher
+from src.bot_engine.faq_normalize import get_exact_faq_index
+from src.bot_engine.faq_semantic import get_semantic_faq_index
+from src.ingestion.excel_parser import load_faq_table
+
+THRESHOLDS = [0.70, 0.75, 0.78, 0.80, 0.82, 0.84, 0.86, 0.88, 0.90, 0.92, 0.95]
+
+
+def load_replay(path: str) -> list[dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def tally(outcomes: list[tuple[str | None, dict]]) -> tuple[int, int, int]:
+    """(resolved, correct, wrong) over (matched question or None, replay entry) pairs."""
+    resolved = correct = wrong = 0
+    for question, entry in outcomes:
+        if question is None:
+            continue
+        resolved += 1
+        if "expected" in entry:
+            if question == entry["expected"]:
+                correct += 1
+            else:
+                wrong += 1
+    return resolved, correct, wrong
+
+
+def run(args):
+    config = load_config()
+    config.setdefault('faq', {})['semantic'] = True
+    faq_table = load_faq_table(os.path.join(PROJECT_ROOT, config['data']['excel_path']))
+    exact_index = get_exact_faq_index(faq_table.questions, config)
+    matcher = get_faq_matcher(faq_table, config)
+    semantic_index = get_semantic_faq_index(faq_table, config, PROJECT_ROOT)
+    replay = load_replay(args.replay)
+
+    fuzzy_questions, nearest = [], []
+    exact_hits = 0
+    for entry in replay:
+        row = exact_index.lookup(entry["query"])
+        if row is not None:
+            exact_hits += 1
+            question = faq_table.questions[row]
+        else:
+            match = matcher.match(entry["query"])
+            question = match.question if match else None
+        fuzzy_questions.append(question)
+        nearest.append(None if question is not None else semantic_index.nearest(entry["query"]))
+
+    resolved, correct, wrong = tally(list(zip(fuzzy_questions, replay)))
+    print(f"Replayed {len(replay)} queries against {len(faq_table)} FAQ entries.")
+    print(f"Exact tier: {exact_hits} resolved ({exact_hits / len(replay):.1%})")
+    print(f"Exact + fuzzy tiers: {resolved} resolved without the LLM ({resolved / len(replay):.1%}), "
+          f"{correct} correct, {wrong} wrong")
+
+    print(f"\n{'threshold':>9} {'resolved':>9} {'share':>7} {'correct':>8} {'wrong':>6} {'precision':>10}")
+    recommended = None
+    for threshold in THRESHOLDS:
+        questions = [
+            question if question is not None
+            else (faq_table.questions[found[0]] if found is not None and found[1] >= threshold else None)
+            for question, found in zip(fuzzy_questions, nearest)
+        ]
+        resolved, correct, wrong = tally(list(zip(questions, replay)))
+        precision = correct / (correct + wrong) if correct + wrong else 1.0
+        if recommended is None and precision >= args.target_precision:
+            recommended = threshold
+        print(f"{threshold:>9.2f} {resolved:>9} {resolved / len(replay):>6.1%} {correct:>8} {wrong:>6} {precision:>10.3f}")
+
+    configured = float(config['faq'].get('semantic_threshold', 0.85))
+    print(f"\nConfigured faq.semantic_threshold: {configured:.2f}")
+    if recommended is not None:
+        print(f"Lowest threshold with precision >= {args.target_precision:.2f}: {recommended:.2f}")
+    else:
+        print(f"No threshold reaches precision {args.target_precision:.2f}; keep the semantic tier off.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('replay', help="JSONL file of {\"query\": ..., \"expected\": ...} lines")
+    parser.add_argument('--target-precision', type=float, default=0.95)
+    run(parser.parse_args())
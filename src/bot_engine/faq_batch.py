@@ -0,0 +1,171 @@
+# src/bot_engine/faq_batch.py
+#
+# Batch FAQ matching for offline analysis (tuning faq.score_cutoff, finding FAQ gaps).
+#
+# Usage:
+#   python -m src.bot_engine.faq_batch queries.csv results.csv [--query-column query]
+#   python -m src.bot_engine.faq_batch queries.jsonl results.jsonl --cutoff 85 --no-semantic
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+import yaml
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+# --- System Path Setup ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(PROJECT_ROOT)
+
+from src.bot_engine.faq_router import FaqRouter, get_faq_router
+from src.ingestion.excel_parser import load_faq_table
+
+# Upper bound for one block of the query x question score matrix
+DEFAULT_MAX_MATRIX_MB = 256
+
+
+class BatchMatch(NamedTuple):
+    """
+    Best FAQ row for one query. For 'exact' and 'fuzzy' the score is WRatio (0-100), for
+    'semantic' the cosine similarity. A 'miss' still carries the best fuzzy row and score,
+    so cutoffs can be tuned from the output.
+    """
+    index: int
+    score: float
+    tier: str
+
+
+def _fuzzy_best(queries: list[str], choices: list[str], max_matrix_mb: int, workers: int) -> tuple[np.ndarray, np.ndarray]:
+    """Best WRatio row and score per query, scoring the full matrix block by block on all threads."""
+    rows = np.full(len(queries), -1, dtype=np.int64)
+    scores = np.zeros(len(queries), dtype=np.float32)
+    if not choices:
+        return rows, scores
+    block = max(1, (max_matrix_mb << 20) // (len(choices) * np.dtype(np.float32).itemsize))
+    for start in range(0, len(queries), block):
+        matrix = process.cdist(
+            queries[start:start + block], choices,
+            scorer=fuzz.WRatio, processor=None, dtype=np.float32, workers=workers,
+        )
+        # argmax takes the first of equal scores, like process.extractOne
+        rows[start:start + block] = matrix.argmax(axis=1)
+        scores[start:start + block] = matrix.max(axis=1)
+    return rows, scores
+
+
+def match_batch(queries: list[str], router: FaqRouter, max_matrix_mb: int = DEFAULT_MAX_MATRIX_MB,
+                workers: int = -1, semantic_workers: int = 4) -> list[BatchMatch]:
+    """
+    Matches a whole array of queries through the router's tiers: exact lookups first, then
+    one vectorized WRatio matrix for the rest (a full scan, not the online shortlist), then
+    the semantic tier, if the router has one, for what is still unmatched.
+    """
+    results = [None] * len(queries)
+    pending = []
+    for position, query in enumerate(queries):
+        row = router.exact_index.lookup(query)
+        if row is not None:
+            results[position] = BatchMatch(row, 100.0, "exact")
+        else:
+            pending.append(position)
+
+    matcher = router.matcher
+    rows, scores = _fuzzy_best([default_process(queries[position]) for position in pending],
+                               matcher.processed_questions, max_matrix_mb, workers)
+    misses = []
+    for position, row, score in zip(pending, rows, scores):
+        tier = "fuzzy" if row >= 0 and score >= matcher.score_cutoff else "miss"
+        results[position] = BatchMatch(int(row), float(score), tier)
+        if tier == "miss":
+            misses.append(position)
+
+    if router.semantic_index is not None and misses:
+        found = router.semantic_index.search_many([queries[position] for position in misses], semantic_workers)
+        for position, match in zip(misses, found):
+            if match is not None:
+                results[position] = BatchMatch(match[0], match[1], "semantic")
+    return results
+
+
+def read_queries(path: str, query_column: str) -> list[dict]:
+    """Reads records from a .csv (with a header) or .jsonl file; each must have query_column."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith('.jsonl'):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(csv.DictReader(f))
+    missing = sum(1 for record in records if query_column not in record)
+    if missing:
+        raise ValueError(f"{missing} records in {path} have no '{query_column}' field")
+    return records
+
+
+def write_results(path: str, records: list[dict]):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.endswith('.jsonl'):
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]) if records else ["query"])
+            writer.writeheader()
+            writer.writerows(records)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Match a file of queries against the FAQ workbook.")
+    parser.add_argument('input', help="queries as .csv (with a header) or .jsonl")
+    parser.add_argument('output', help="results as .csv or .jsonl: the input fields plus match columns")
+    parser.add_argument('--query-column', default='query')
+    parser.add_argument('--config', default=os.path.join(PROJECT_ROOT, "config", "settings.yaml"))
+    parser.add_argument('--cutoff', type=float, help="override faq.score_cutoff")
+    parser.add_argument('--no-semantic', action='store_true', help="skip the semantic tier (no embedding calls)")
+    parser.add_argument('--max-matrix-mb', type=int, default=DEFAULT_MAX_MATRIX_MB)
+    parser.add_argument('--workers', type=int, default=-1, help="threads for the score matrix (-1 = all CPUs)")
+    args = parser.parse_args(argv)
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    faq_config = config.setdefault('faq', {})
+    if args.cutoff is not None:
+        faq_config['score_cutoff'] = args.cutoff
+    if args.no_semantic:
+        faq_config['semantic'] = False
+
+    faq_table = load_faq_table(os.path.join(PROJECT_ROOT, config['data']['excel_path']))
+    if faq_table is None:
+        sys.exit("Could not load the FAQ workbook.")
+    router = get_faq_router(faq_table, config, PROJECT_ROOT)
+    records = read_queries(args.input, args.query_column)
+
+    start = time.perf_counter()
+    matches = match_batch(
+        [str(record[args.query_column]) for record in records], router,
+        max_matrix_mb=args.max_matrix_mb, workers=args.workers,
+        semantic_workers=int(config.get('vector_store', {}).get('embedding_concurrency', 4)),
+    )
+    elapsed = time.perf_counter() - start
+
+    results = []
+    tiers = {}
+    for record, match in zip(records, matches):
+        tiers[match.tier] = tiers.get(match.tier, 0) + 1
+        results.append({
+            **record,
+            "faq_index": match.index,
+            "faq_score": round(match.score, 4),
+            "faq_tier": match.tier,
+            "faq_question": faq_table.questions[match.index] if match.index >= 0 else "",
+        })
+    write_results(args.output, results)
+    print(f"Matched {len(records)} queries against {len(faq_table)} FAQ entries in {elapsed:.1f}s: "
+          + ", ".join(f"{tier} {count}" for tier, count in sorted(tiers.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# src/bot_engine/faq_matcher.py
+
+import copy
+from typing import NamedTuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+from src.ingestion.excel_parser import FaqTable
+
+NGRAM_SIZE = 3
+
+
+class FaqMatch(NamedTuple):
+    index: int
+    question: str
+    answer: str
+    score: float
+    tier: str = "fuzzy"
+
+
+def question_ngrams(processed: str) -> set[str]:
+    """Character trigrams of an already processed string, padded so word boundaries count."""
+    padded = f" {processed} "
+    if len(padded) < NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+class FaqMatcher:
+    """
+    Fuzzy FAQ lookup over a prebuilt trigram inverted index.
+
+    Postings are kept as one CSR-style pair of numpy arrays (row IDs sorted by trigram, plus
+    offsets). A query reads the posting lists of its rarest trigrams, up to max_postings row
+    IDs in total, counts shared trigrams per row, and only the best max_candidates rows are
+    scored with rapidfuzz's WRatio, the same scorer and preprocessing as thefuzz's
+    process.extractOne. Matches map to answers by position.
+
+    Per-query cost depends on the query and max_postings, not on the number of FAQ rows.
+    """
+
+    def __init__(self, questions: list[str], answers: list[str], score_cutoff: float = 90,
+                 max_candidates: int = 64, max_postings: int = 5000):
+        self.questions = list(questions)
+        self.answers = list(answers)
+        self.score_cutoff = score_cutoff
+        self.max_candidates = max_candidates
+        self.max_postings = max_postings
+        self._processed = [default_process(question) for question in self.questions]
+        self._vocabulary = {}
+        self._row_grams = [self._gram_ids(processed) for processed in self._processed]
+        self._assemble_postings()
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    @property
+    def processed_questions(self) -> list[str]:
+        """The questions after rapidfuzz's default_process, as scored by match()."""
+        return self._processed
+
+    def _gram_ids(self, processed: str) -> np.ndarray:
+        """Trigram IDs of one processed question, adding unseen trigrams to the vocabulary."""
+        return np.fromiter(
+            (self._vocabulary.setdefault(gram, len(self._vocabulary)) for gram in question_ngrams(processed)),
+            dtype=np.int32,
+        )
+
+    def _assemble_postings(self):
+        """Lays the per-row trigram IDs out as CSR postings; pure numpy, no per-row Python work."""
+        sizes = np.fromiter((len(grams) for grams in self._row_grams), dtype=np.int64, count=len(self._row_grams))
+        gram_ids = np.concatenate(self._row_grams) if self._row_grams else np.empty(0, dtype=np.int32)
+        row_ids = np.repeat(np.arange(len(self._row_grams), dtype=np.int32), sizes)
+        order = np.argsort(gram_ids, kind='stable')
+        self._postings = row_ids[order]
+        self._offsets = np.zeros(len(self._vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(self._vocabulary)), out=self._offsets[1:])
+        self._row_sizes = np.maximum(sizes, 1)
+
+    def updated(self, questions: list[str], answers: list[str]) -> "FaqMatcher":
+        """
+        Returns a new matcher for an edited FAQ table, leaving this one untouched (copy-on-write),
+        so lookups in flight keep a consistent view. Only questions that weren't in this matcher
+        are processed and split into trigrams; the postings are then re-laid out in numpy.
+        """
+        previous = {}
+        for row, question in enumerate(self.questions):
+            previous.setdefault(question, row)
+
+        matcher = copy.copy(self)
+        matcher.questions = list(questions)
+        matcher.answers = list(answers)
+        matcher._vocabulary = dict(self._vocabulary)
+        matcher._processed, matcher._row_grams = [], []
+        for question in matcher.questions:
+            row = previous.get(question)
+            if row is None:
+                processed = default_process(question)
+                matcher._processed.append(processed)
+                matcher._row_grams.append(matcher._gram_ids(processed))
+            else:
+                matcher._processed.append(self._processed[row])
+                matcher._row_grams.append(self._row_grams[row])
+        matcher._assemble_postings()
+        return matcher
+
+    def _shortlist(self, processed_query: str) -> np.ndarray:
+        """Rows sharing the largest fraction of the query's selective trigrams, best first."""
+        gram_ids = np.asarray(
+            [self._vocabulary[gram] for gram in question_ngrams(processed_query) if gram in self._vocabulary],
+            dtype=np.int64,
+        )
+        if not len(gram_ids):
+            return gram_ids
+        # Rarest trigrams first, up to max_postings rows in total (but always the rarest one)
+        lengths = self._offsets[gram_ids + 1] - self._offsets[gram_ids]
+        order = np.argsort(lengths, kind='stable')
+        used = max(1, int(np.searchsorted(np.cumsum(lengths[order]), self.max_postings, side='right')))
+        grams = gram_ids[order[:used]]
+        postings = np.concatenate([self._postings[self._offsets[gram]:self._offsets[gram + 1]] for gram in grams])
+        rows, counts = np.unique(postings, return_counts=True)
+        # Containment rather than raw overlap, so a short question inside a long query (WRatio's
+        # partial matching) isn't outranked by long questions that merely share more trigrams
+        overlap = counts / np.minimum(self._row_sizes[rows], used)
+        if len(rows) > self.max_candidates:
+            top = np.argpartition(overlap, -self.max_candidates)[-self.max_candidates:]
+            rows, overlap = rows[top], overlap[top]
+        return rows[np.argsort(-overlap, kind='stable')]
+
+    def match(self, query: str) -> FaqMatch | None:
+        """The best FAQ entry scoring at least score_cutoff, or None."""
+        processed_query = default_process(query)
+        candidates = self._shortlist(processed_query)
+        if not len(candidates):
+            return None
+        best = process.extractOne(
+            processed_query, [self._processed[row] for row in candidates],
+            scorer=fuzz.WRatio, processor=None, score_cutoff=self.score_cutoff,
+        )
+        if best is None:
+            return None
+        row = int(candidates[best[2]])
+        return FaqMatch(row, self.questions[row], self.answers[row], best[1])
+
+
+def get_faq_matcher(faq_table: FaqTable, config: dict) -> FaqMatcher:
+    """Builds the matcher from the 'faq' settings."""
+    faq_config = config.get('faq', {})
+    return FaqMatcher(
+        faq_table.questions, faq_table.answers,
+        score_cutoff=float(faq_config.get('score_cutoff', 90)),
+        max_candidates=int(faq_config.get('max_candidates', 64)),
+        max_postings=int(faq_config.get('max_postings', 5000)),
+    )
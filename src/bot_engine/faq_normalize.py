@@ -0,0 +1,59 @@
+# src/bot_engine/faq_normalize.py
+
+import re
+import unicodedata
+
+# Courtesy and filler words that never change what a question asks
+STOP_TOKENS = frozenset({
+    "a", "an", "the", "please", "pls", "plz", "kindly", "hi", "hello", "hey",
+    "dear", "sir", "madam", "maam", "thanks", "thx",
+})
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(text: str, stop_tokens: frozenset[str] = STOP_TOKENS) -> str:
+    """
+    Canonical form of a question for exact lookup: NFKC-normalized, casefolded, with
+    punctuation and symbols turned into spaces, stop tokens dropped and whitespace collapsed.
+    "How do I cancel my ticket??" and "how do i  cancel my ticket" normalize the same.
+    """
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = "".join(" " if unicodedata.category(char)[0] in "PS" else char for char in text)
+    return " ".join(token for token in _WHITESPACE.split(text) if token and token not in stop_tokens)
+
+
+class ExactFaqIndex:
+    """Hash map from normalized question to FAQ row; the first row wins for duplicate questions."""
+
+    def __init__(self, questions: list[str], stop_tokens: frozenset[str] = STOP_TOKENS,
+                 keys: list[str] | None = None):
+        self.stop_tokens = stop_tokens
+        self.questions = list(questions)
+        self._keys = keys if keys is not None else [normalize_question(question, stop_tokens) for question in questions]
+        self._rows = {}
+        for row, key in enumerate(self._keys):
+            if key:
+                self._rows.setdefault(key, row)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def lookup(self, query: str) -> int | None:
+        key = normalize_question(query, self.stop_tokens)
+        return self._rows.get(key) if key else None
+
+    def updated(self, questions: list[str]) -> "ExactFaqIndex":
+        """A new index for an edited FAQ table; only questions not seen before are normalized."""
+        previous = dict(zip(self.questions, self._keys))
+        keys = [
+            previous[question] if question in previous else normalize_question(question, self.stop_tokens)
+            for question in questions
+        ]
+        return ExactFaqIndex(questions, self.stop_tokens, keys)
+
+
+def get_exact_faq_index(questions: list[str], config: dict) -> ExactFaqIndex:
+    """Builds the exact tier; 'faq.stop_tokens' replaces the default filler words."""
+    stop_tokens = config.get('faq', {}).get('stop_tokens')
+    return ExactFaqIndex(questions, frozenset(stop_tokens) if stop_tokens is not None else STOP_TOKENS)
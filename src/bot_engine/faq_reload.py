@@ -0,0 +1,111 @@
+# src/bot_engine/faq_reload.py
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+
+from src.bot_engine.faq_router import FaqRouter
+from src.bot_engine.hot_swap import HotSwapRef
+from src.ingestion.excel_parser import FaqTable, load_faq_table
+
+# Upper bound on the wait between retries of a failed reload
+MAX_RETRY_SECONDS = 600.0
+
+
+def row_hashes(faq_table: FaqTable) -> list[str]:
+    """Content hash of every FAQ row (question and answer), in row order."""
+    return [
+        hashlib.sha256(f"{question}\0{answer}".encode('utf-8')).hexdigest()
+        for question, answer in zip(faq_table.questions, faq_table.answers)
+    ]
+
+
+def diff_faq_rows(old_hashes: list[str], new_hashes: list[str]) -> tuple[int, int]:
+    """(added, removed) row counts between two versions of the table; an edited row counts as both."""
+    old_counts, new_counts = Counter(old_hashes), Counter(new_hashes)
+    return sum((new_counts - old_counts).values()), sum((old_counts - new_counts).values())
+
+
+def _file_signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FaqWatcher:
+    """
+    Background thread that polls the FAQ workbook and, when its content changed, swaps an
+    incrementally updated FaqRouter into faq_ref. The document retriever and RAG chain are
+    not touched. A reload that fails (e.g. a workbook caught mid-save, or a semantic tier
+    that couldn't be re-embedded) is retried with exponential backoff until it succeeds;
+    the current router, or one with the new rows but a partial semantic tier, keeps
+    serving meanwhile.
+    """
+
+    def __init__(self, excel_path: str, faq_ref: HotSwapRef, faq_table: FaqTable, config: dict,
+                 project_root: str, poll_seconds: float = 10.0):
+        self.excel_path = excel_path
+        self.faq_ref = faq_ref
+        self.config = config
+        self.project_root = project_root
+        self.poll_seconds = poll_seconds
+        self._hashes = row_hashes(faq_table)
+        self._signature = _file_signature(excel_path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="faq-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        failures = 0
+        retry_at = None
+        while not self._stop.wait(self.poll_seconds):
+            signature = _file_signature(self.excel_path)
+            if signature is None:
+                continue
+            retry_due = retry_at is not None and time.monotonic() >= retry_at
+            if signature == self._signature and not retry_due:
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                failures += 1
+                delay = min(self.poll_seconds * 2 ** failures, MAX_RETRY_SECONDS)
+                retry_at = time.monotonic() + delay
+                print(f"Failed to reload the FAQ workbook ({e}); retrying in {delay:.0f}s.")
+                continue
+            # Only a successful reload marks this version of the file as handled
+            self._signature = signature
+            failures, retry_at = 0, None
+
+    def reload(self) -> bool:
+        """
+        Loads the workbook and swaps in an updated router if any row changed (or the semantic
+        tier is behind). Returns whether it did; raises if the result is still incomplete.
+        """
+        faq_table = load_faq_table(self.excel_path)
+        if faq_table is None:
+            raise ValueError(f"could not read {self.excel_path}")
+        hashes = row_hashes(faq_table)
+        router: FaqRouter = self.faq_ref.get()
+        if hashes == self._hashes and not router.semantic_stale:
+            return False
+
+        added, removed = diff_faq_rows(self._hashes, hashes)
+        print(f"FAQ workbook changed: {added} rows added or edited, {removed} removed or replaced. Updating...")
+        updated_router = router.updated(faq_table, self.config, self.project_root)
+        self.faq_ref.swap(updated_router, version=hashlib.sha256("".join(hashes).encode('ascii')).hexdigest()[:12])
+        self._hashes = hashes
+        print(f"FAQ data updated to {len(faq_table)} entries.")
+        if updated_router.semantic_stale:
+            raise RuntimeError("the semantic FAQ index only covers unchanged questions")
+        return True
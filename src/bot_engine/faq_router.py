@@ -0,0 +1,118 @@
+# src/bot_engine/faq_router.py
+
+import copy
+import logging
+import threading
+from collections import Counter
+
+from src.bot_engine.faq_matcher import FaqMatch, FaqMatcher, get_faq_matcher
+from src.bot_engine.faq_normalize import ExactFaqIndex, get_exact_faq_index
+from src.bot_engine.faq_semantic import SemanticFaqIndex, get_semantic_faq_index, update_semantic_faq_index
+from src.ingestion.excel_parser import FaqTable
+
+log = logging.getLogger(__name__)
+
+TIERS = ("exact", "fuzzy", "semantic", "miss")
+
+
+class FaqRouter:
+    """
+    Tiered FAQ lookup, cheapest first: a hash lookup of the normalized question catches
+    copies that differ only in case, punctuation or filler words, the fuzzy trigram matcher
+    catches near-literal rewordings, then the semantic index catches paraphrases. A query
+    that no tier resolves ("miss") goes on to the RAG chain.
+
+    Every lookup is counted per tier, and report() summarizes the counts.
+    """
+
+    def __init__(self, matcher: FaqMatcher, semantic_index: SemanticFaqIndex | None = None,
+                 exact_index: ExactFaqIndex | None = None):
+        self.matcher = matcher
+        self.semantic_index = semantic_index
+        self.exact_index = exact_index if exact_index is not None else ExactFaqIndex(matcher.questions)
+        # Set on a router whose semantic tier couldn't be brought up to date by updated()
+        self.semantic_stale = False
+        self._hits = Counter()
+        self._hits_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.matcher)
+
+    def _match(self, query: str) -> FaqMatch | None:
+        row = self.exact_index.lookup(query)
+        if row is not None:
+            return FaqMatch(row, self.matcher.questions[row], self.matcher.answers[row], 100.0, "exact")
+
+        match = self.matcher.match(query)
+        if match is not None or self.semantic_index is None:
+            return match
+        try:
+            found = self.semantic_index.search(query)
+        except Exception as e:
+            # The embedding call failing only costs us this tier; the question still gets an answer via RAG
+            log.warning(f"Semantic FAQ lookup failed: {e}")
+            return None
+        if found is None:
+            return None
+        row, similarity = found
+        return FaqMatch(row, self.matcher.questions[row], self.matcher.answers[row], similarity, "semantic")
+
+    def route(self, query: str) -> FaqMatch | None:
+        match = self._match(query)
+        with self._hits_lock:
+            self._hits[match.tier if match is not None else "miss"] += 1
+        return match
+
+    def updated(self, faq_table: FaqTable, config: dict, project_root: str) -> "FaqRouter":
+        """
+        A new router for an edited FAQ table, built from incrementally updated copies of each
+        tier; this router keeps serving unchanged until the caller swaps the new one in.
+        The hit counters are shared, so stats carry across reloads.
+
+        If embedding the new questions fails, the semantic tier keeps the vectors it already
+        has for unchanged questions and semantic_stale is set, so the caller can retry.
+        """
+        router = copy.copy(self)
+        router.exact_index = self.exact_index.updated(faq_table.questions)
+        router.matcher = self.matcher.updated(faq_table.questions, faq_table.answers)
+        router.semantic_stale = False
+        if self.semantic_index is not None:
+            try:
+                router.semantic_index = update_semantic_faq_index(
+                    self.semantic_index, self.matcher.questions, faq_table, config, project_root
+                )
+            except Exception as e:
+                log.warning(f"Could not update the semantic FAQ index; it only covers unchanged questions for now: {e}")
+                router.semantic_index = self.semantic_index.covering(self.matcher.questions, faq_table.questions)
+                router.semantic_stale = True
+        return router
+
+    def stats(self) -> dict[str, int]:
+        with self._hits_lock:
+            return {tier: self._hits[tier] for tier in TIERS}
+
+    def report(self) -> str:
+        stats = self.stats()
+        total = sum(stats.values())
+        if not total:
+            return "FAQ router: no queries yet"
+        shares = ", ".join(f"{tier} {count} ({count / total:.1%})" for tier, count in stats.items())
+        return f"FAQ router: {total} queries - {shares}"
+
+
+def get_faq_router(faq_table: FaqTable, config: dict, project_root: str) -> FaqRouter:
+    """
+    Builds the exact and fuzzy tiers and, with 'faq.semantic' on, loads or builds the semantic
+    index. The semantic tier is optional: if it can't be built (e.g. the embedding API is
+    down), the router runs without it rather than taking the other tiers down too.
+    """
+    try:
+        semantic_index = get_semantic_faq_index(faq_table, config, project_root)
+    except Exception as e:
+        log.warning(f"Semantic FAQ index unavailable, running without the semantic tier: {e}")
+        semantic_index = None
+    return FaqRouter(
+        get_faq_matcher(faq_table, config),
+        semantic_index,
+        get_exact_faq_index(faq_table.questions, config),
+    )
@@ -0,0 +1,195 @@
+# src/bot_engine/faq_semantic.py
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.ingestion.excel_parser import FaqTable
+from src.vector_store.embeddings import get_embeddings
+
+INDEX_FILENAME = "faq.faiss"
+META_FILENAME = "faq_meta.json"
+
+
+def questions_hash(questions: list[str]) -> str:
+    """Identifies the exact list of FAQ questions an index was built from."""
+    digest = hashlib.sha256()
+    for question in questions:
+        digest.update(question.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _normalized(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    faiss.normalize_L2(matrix)
+    return matrix
+
+
+class SemanticFaqIndex:
+    """
+    Cosine-similarity index over the FAQ questions (an exact inner-product index over
+    L2-normalized embeddings), so paraphrased questions can still find a curated answer.
+    Vector i of the index is row i of the FAQ table, unless rows maps it elsewhere (an
+    index that only covers part of the table, see covering()).
+    """
+
+    def __init__(self, index: faiss.Index, embeddings: Embeddings, threshold: float = 0.85,
+                 rows: np.ndarray | None = None):
+        self.index = index
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.rows = rows if rows is not None else np.arange(index.ntotal)
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    @classmethod
+    def build(cls, questions: list[str], embeddings: Embeddings, threshold: float = 0.85) -> "SemanticFaqIndex":
+        vectors = _normalized(embeddings.embed_documents(questions)) if questions else None
+        index = faiss.IndexFlatIP(vectors.shape[1] if vectors is not None else 1)
+        if vectors is not None:
+            index.add(vectors)
+        return cls(index, embeddings, threshold)
+
+    def nearest(self, query: str) -> tuple[int, float] | None:
+        """(row, cosine similarity) of the closest question, whatever the similarity."""
+        if not len(self):
+            return None
+        similarities, positions = self.index.search(_normalized(self.embeddings.embed_query(query)), 1)
+        if positions[0][0] < 0:
+            return None
+        return int(self.rows[positions[0][0]]), float(similarities[0][0])
+
+    def search(self, query: str) -> tuple[int, float] | None:
+        """(row, cosine similarity) of the closest question if it reaches the threshold, else None."""
+        nearest = self.nearest(query)
+        return nearest if nearest is not None and nearest[1] >= self.threshold else None
+
+    def search_many(self, queries: list[str], workers: int = 4) -> list[tuple[int, float] | None]:
+        """search() for many queries: query embeddings are fetched concurrently, then searched as one batch."""
+        if not len(self) or not queries:
+            return [None] * len(queries)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            vectors = list(pool.map(self.embeddings.embed_query, queries))
+        similarities, positions = self.index.search(_normalized(vectors), 1)
+        return [
+            (int(self.rows[position]), float(similarity)) if position >= 0 and similarity >= self.threshold else None
+            for position, similarity in zip(positions[:, 0], similarities[:, 0])
+        ]
+
+    def _positions_by_question(self, old_questions: list[str]) -> dict[str, int]:
+        """Index position of the vector for each question this index covers (rows refer to old_questions)."""
+        previous = {}
+        for position, row in enumerate(self.rows):
+            previous.setdefault(old_questions[row], position)
+        return previous
+
+    def covering(self, old_questions: list[str], questions: list[str]) -> "SemanticFaqIndex":
+        """
+        A new index over the questions of an edited table that this one already has vectors
+        for, without any embedding calls; new questions are simply not covered. Used when
+        re-embedding fails, so paraphrases of unchanged questions still resolve.
+        """
+        previous = self._positions_by_question(old_questions)
+        kept = [(row, previous[question]) for row, question in enumerate(questions) if question in previous]
+        index = faiss.IndexFlatIP(self.index.d)
+        if kept:
+            index.add(self.index.reconstruct_n(0, self.index.ntotal)[[position for _, position in kept]])
+        return SemanticFaqIndex(index, self.embeddings, self.threshold, np.asarray([row for row, _ in kept], dtype=np.int64))
+
+    def updated(self, old_questions: list[str], questions: list[str]) -> "SemanticFaqIndex":
+        """
+        A new index for an edited FAQ table, leaving this one untouched. Vectors of questions
+        already indexed (as old_questions) are copied over; only new questions are embedded.
+        """
+        previous = self._positions_by_question(old_questions)
+        new_questions = sorted({question for question in questions if question not in previous})
+        old_vectors = self.index.reconstruct_n(0, self.index.ntotal) if len(self) else None
+        new_vectors = dict(zip(new_questions, _normalized(self.embeddings.embed_documents(new_questions)))) \
+            if new_questions else {}
+        print(f"Semantic FAQ index: embedding {len(new_questions)} new questions, "
+              f"re-using {len(questions) - sum(question in new_vectors for question in questions)} vectors.")
+        if not questions:
+            return SemanticFaqIndex(faiss.IndexFlatIP(self.index.d), self.embeddings, self.threshold)
+        vectors = np.stack([
+            new_vectors[question] if question in new_vectors else old_vectors[previous[question]]
+            for question in questions
+        ])
+        index = faiss.IndexFlatIP(vectors.shape[1])
+        index.add(vectors)
+        return SemanticFaqIndex(index, self.embeddings, self.threshold)
+
+    def save(self, index_path: str, meta: dict):
+        """Writes the index and its metadata via temporary files, so readers never see a partial index."""
+        os.makedirs(index_path, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(index_path, INDEX_FILENAME + ".tmp"))
+        with open(os.path.join(index_path, META_FILENAME + ".tmp"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        # The metadata goes last: an index without matching metadata is simply rebuilt
+        meta_path = os.path.join(index_path, META_FILENAME)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        os.replace(os.path.join(index_path, INDEX_FILENAME + ".tmp"), os.path.join(index_path, INDEX_FILENAME))
+        os.replace(meta_path + ".tmp", meta_path)
+
+
+def _load_meta(index_path: str) -> dict | None:
+    try:
+        with open(os.path.join(index_path, META_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def faq_index_path(config: dict, project_root: str) -> str:
+    """'data.faq_index_path', by default a 'faq_index' directory next to the main vector store."""
+    data_config = config['data']
+    default = os.path.join(os.path.dirname(data_config['vector_store_path'].rstrip('/')), 'faq_index')
+    return os.path.join(project_root, data_config.get('faq_index_path', default))
+
+
+def _index_meta(faq_table: FaqTable, config: dict) -> dict:
+    return {
+        "embedding_model": config['gemini']['embedding_model'],
+        "questions_sha256": questions_hash(faq_table.questions),
+    }
+
+
+def update_semantic_faq_index(semantic_index: SemanticFaqIndex, old_questions: list[str], faq_table: FaqTable,
+                              config: dict, project_root: str) -> SemanticFaqIndex:
+    """Incrementally updates the semantic index for an edited FAQ table and persists the result."""
+    updated_index = semantic_index.updated(old_questions, faq_table.questions)
+    updated_index.save(faq_index_path(config, project_root), _index_meta(faq_table, config))
+    return updated_index
+
+
+def get_semantic_faq_index(faq_table: FaqTable, config: dict, project_root: str) -> SemanticFaqIndex | None:
+    """
+    Loads the persisted FAQ vector index, or (re)builds it when the questions or the embedding
+    model changed. Returns None when 'faq.semantic' is off.
+    """
+    faq_config = config.get('faq', {})
+    if not faq_config.get('semantic', False):
+        return None
+    threshold = float(faq_config.get('semantic_threshold', 0.85))
+    # Same embeddings (and embedding cache) as the knowledge base, so unchanged questions aren't re-embedded
+    embeddings = get_embeddings(config, project_root)
+    index_path = faq_index_path(config, project_root)
+    meta = _index_meta(faq_table, config)
+
+    if _load_meta(index_path) == meta:
+        print("Semantic FAQ index found. Loading from disk...")
+        return SemanticFaqIndex(faiss.read_index(os.path.join(index_path, INDEX_FILENAME)), embeddings, threshold)
+
+    print(f"Building semantic FAQ index over {len(faq_table)} questions...")
+    semantic_index = SemanticFaqIndex.build(faq_table.questions, embeddings, threshold)
+    semantic_index.save(index_path, meta)
+    return semantic_index
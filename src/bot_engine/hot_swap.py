@@ -0,0 +1,31 @@
+# src/bot_engine/hot_swap.py
+
+import threading
+from typing import Any
+
+
+class HotSwapRef:
+    """
+    Holds a value that background threads can replace while requests are being served.
+
+    Readers take a reference with get() at the start of a request and keep using that
+    object until they finish, so an in-flight request is never switched mid-way; the
+    next request simply sees the new value.
+    """
+
+    def __init__(self, value: Any, version: str | None = None):
+        self._lock = threading.Lock()
+        self._value = value
+        self._version = version
+
+    def get(self) -> Any:
+        return self._value
+
+    @property
+    def version(self) -> str | None:
+        return self._version
+
+    def swap(self, value: Any, version: str | None = None):
+        with self._lock:
+            self._value = value
+            self._version = version
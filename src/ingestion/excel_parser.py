@@ -1,36 +1,152 @@
 # src/ingestion/excel_parser.py
 
-import pandas as pd
+import json
+import os
+from dataclasses import dataclass, field
+
 import logging
+from openpyxl import load_workbook
+
+from src.utils.hashing import hash_file
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
-def parse_excel_qa(file_path: str) -> list[dict] or None:
+QUESTION_COLUMN = 'user_desc'
+ANSWER_COLUMN = 'user_reply_desc'
+SIDECAR_SUFFIX = '.faqcache'
+# Version 2 switched the sidecar from pickle to JSON, so loading it can never run code
+SIDECAR_VERSION = 2
+
+
+@dataclass
+class FaqTable:
+    """FAQ pairs held as two parallel lists; the answer to questions[i] is answers[i]."""
+    questions: list[str] = field(default_factory=list)
+    answers: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def to_records(self) -> list[dict]:
+        return [
+            {QUESTION_COLUMN: question, ANSWER_COLUMN: answer}
+            for question, answer in zip(self.questions, self.answers)
+        ]
+
+
+def _cell_text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def _read_workbook(file_path: str) -> FaqTable | None:
+    """Streams the first sheet in read-only mode straight into parallel question/answer lists."""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_cell_text(value) for value in next(rows, ())]
+        # Ensure the required columns exist
+        if QUESTION_COLUMN not in header or ANSWER_COLUMN not in header:
+            log.error(f"Excel file at {file_path} must contain '{QUESTION_COLUMN}' and '{ANSWER_COLUMN}' columns.")
+            return None
+        question_index = header.index(QUESTION_COLUMN)
+        answer_index = header.index(ANSWER_COLUMN)
+
+        table = FaqTable()
+        for row in rows:
+            question = _cell_text(row[question_index]) if question_index < len(row) else ''
+            if not question:
+                continue
+            table.questions.append(question)
+            table.answers.append(_cell_text(row[answer_index]) if answer_index < len(row) else '')
+        return table
+    finally:
+        workbook.close()
+
+
+def _load_sidecar(sidecar_path: str) -> dict | None:
+    try:
+        with open(sidecar_path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring unreadable FAQ cache {sidecar_path}: {e}")
+        return None
+    if not isinstance(sidecar, dict) or sidecar.get('version') != SIDECAR_VERSION:
+        return None
+    return sidecar
+
+
+def _save_sidecar(sidecar_path: str, sidecar: dict):
+    temp_path = sidecar_path + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(sidecar, f, ensure_ascii=False)
+        os.replace(temp_path, sidecar_path)
+    except OSError as e:
+        # A read-only data directory just means every start is a cold start
+        log.warning(f"Could not write FAQ cache {sidecar_path}: {e}")
+
+
+def load_faq_table(file_path: str) -> FaqTable | None:
     """
-    Parses a two-column Excel file (user_desc, user_reply_desc) into a list of dictionaries.
-    
+    Loads the FAQ workbook into a FaqTable, using a JSON sidecar cache next to the file.
+
+    The sidecar is reused as-is when the workbook's mtime and size are unchanged, and
+    after a content-hash check when only the mtime moved (e.g. the file was copied).
+
     Args:
         file_path: The path to the .xlsx file.
 
     Returns:
-        A list of dictionaries, where each dictionary is a Q&A pair, or None if an error occurs.
+        A FaqTable, or None if an error occurs.
     """
+    sidecar_path = file_path + SIDECAR_SUFFIX
     try:
-        df = pd.read_excel(file_path)
-        # Ensure the required columns exist
-        if 'user_desc' not in df.columns or 'user_reply_desc' not in df.columns:
-            log.error(f"Excel file at {file_path} must contain 'user_desc' and 'user_reply_desc' columns.")
-            return None
-        
-        # Convert dataframe to a list of records (dictionaries)
-        qa_list = df.to_dict(orient='records')
-        log.info(f"Successfully parsed {len(qa_list)} Q&A pairs from {file_path}")
-        return qa_list
+        stat = os.stat(file_path)
+        sidecar = _load_sidecar(sidecar_path)
+        if sidecar and sidecar['mtime_ns'] == stat.st_mtime_ns and sidecar['size'] == stat.st_size:
+            table = FaqTable(sidecar['questions'], sidecar['answers'])
+            log.info(f"Loaded {len(table)} Q&A pairs for {file_path} from cache")
+            return table
+
+        file_hash = hash_file(file_path)
+        if sidecar and sidecar['sha256'] == file_hash:
+            table = FaqTable(sidecar['questions'], sidecar['answers'])
+        else:
+            table = _read_workbook(file_path)
+            if table is None:
+                return None
+
+        _save_sidecar(sidecar_path, {
+            'version': SIDECAR_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': file_hash,
+            'questions': table.questions,
+            'answers': table.answers,
+        })
+        log.info(f"Successfully parsed {len(table)} Q&A pairs from {file_path}")
+        return table
 
     except FileNotFoundError:
         log.error(f"Excel file not found at path: {file_path}")
         return None
     except Exception as e:
         log.error(f"An error occurred while parsing the Excel file: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def parse_excel_qa(file_path: str) -> list[dict] or None:
+    """
+    Parses a two-column Excel file (user_desc, user_reply_desc) into a list of dictionaries.
+    
+    Args:
+        file_path: The path to the .xlsx file.
+
+    Returns:
+        A list of dictionaries, where each dictionary is a Q&A pair, or None if an error occurs.
+    """
+    table = load_faq_table(file_path)
+    return table.to_records() if table is not None else None
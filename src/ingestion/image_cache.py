@@ -0,0 +1,234 @@
+# src/ingestion/image_cache.py
+
+import hashlib
+import io
+import os
+import sqlite3
+import time
+from itertools import combinations
+
+from PIL import Image
+
+HASH_BITS = 64
+# Multi-index hashing: the hash is split into bands that are indexed separately
+HASH_BANDS = 4
+BAND_BITS = HASH_BITS // HASH_BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+# Pending writes are committed this often, so an interrupted build keeps what it paid for
+COMMIT_EVERY = 25
+
+
+def perceptual_hash(image_bytes: bytes) -> int | None:
+    """
+    Computes a 64-bit difference hash (dHash) of an image.
+    Resized or re-encoded copies of the same picture end up a few bits apart at most.
+    Returns None if the bytes can't be decoded as an image.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            pixels = list(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    except Exception:
+        return None
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit, so hashes are stored in two's complement."""
+    return value - (1 << HASH_BITS) if value >= (1 << (HASH_BITS - 1)) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def describer_fingerprint(model_name: str, prompt: str) -> str:
+    """Identifies what produced a description; entries from another model or prompt never match."""
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode('utf-8')).hexdigest()[:16]
+
+
+class ImageDescriptionCache:
+    """
+    Durable SQLite cache of image descriptions keyed by describer fingerprint (vision model
+    and prompt) and perceptual hash.
+
+    A lookup matches the closest stored hash within max_distance bits (Hamming distance),
+    so near-duplicate screenshots reuse an existing description. Only the least recently
+    used max_entries descriptions are kept per fingerprint.
+
+    Near-duplicate lookups use multi-index hashing: two hashes within max_distance bits of
+    each other agree to within max_distance // HASH_BANDS bits on at least one of the
+    HASH_BANDS 16-bit bands, so only hashes found by probing each band's neighbourhood
+    are compared, rather than every cached hash.
+    """
+
+    def __init__(self, db_path: str, fingerprint: str = "", max_entries: int = 20000, max_distance: int = 6):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(db_path)
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(descriptions)")]
+        if columns and 'fingerprint' not in columns:
+            # Caches from before fingerprints can't tell stub descriptions from real ones
+            print(f"Discarding image description cache {db_path}: it doesn't record which model wrote each entry.")
+            self._connection.execute("DROP TABLE descriptions")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS descriptions ("
+            " fingerprint TEXT NOT NULL,"
+            " phash INTEGER NOT NULL,"
+            " description TEXT NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (fingerprint, phash))"
+        )
+        self._connection.commit()
+        # Every band value within this many bits of the query's band is probed
+        band_radius = min(max_distance // HASH_BANDS, BAND_BITS)
+        self._probe_masks = [
+            sum(1 << bit for bit in bits)
+            for flipped in range(band_radius + 1)
+            for bits in combinations(range(BAND_BITS), flipped)
+        ]
+        self._bands = [{} for _ in range(HASH_BANDS)]
+        self._hashes = set()
+        for row in self._connection.execute("SELECT phash FROM descriptions WHERE fingerprint = ?", (fingerprint,)):
+            self._index(_to_unsigned(row[0]))
+        self._uncommitted = 0
+
+    @staticmethod
+    def _band_values(phash: int) -> list[int]:
+        return [(phash >> (band * BAND_BITS)) & BAND_MASK for band in range(HASH_BANDS)]
+
+    def _index(self, phash: int):
+        if phash in self._hashes:
+            return
+        self._hashes.add(phash)
+        for band, value in zip(self._bands, self._band_values(phash)):
+            band.setdefault(value, set()).add(phash)
+
+    def _unindex(self, phash: int):
+        if phash not in self._hashes:
+            return
+        self._hashes.discard(phash)
+        for band, value in zip(self._bands, self._band_values(phash)):
+            bucket = band.get(value)
+            if bucket is not None:
+                bucket.discard(phash)
+                if not bucket:
+                    del band[value]
+
+    def _candidates(self, phash: int) -> set[int]:
+        """Cached hashes that can be within max_distance bits of phash (a superset of them)."""
+        candidates = set()
+        for band, value in zip(self._bands, self._band_values(phash)):
+            for mask in self._probe_masks:
+                bucket = band.get(value ^ mask)
+                if bucket:
+                    candidates |= bucket
+        return candidates
+
+    def _wrote(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self._connection.commit()
+            self._uncommitted = 0
+
+    def lookup(self, phash: int | None) -> str | None:
+        """Returns the description of the closest cached image within the threshold, or None."""
+        if phash is None:
+            self.misses += 1
+            return None
+
+        best_hash, best_distance = None, self.max_distance + 1
+        if phash in self._hashes:
+            best_hash, best_distance = phash, 0
+        else:
+            for cached_hash in self._candidates(phash):
+                distance = (cached_hash ^ phash).bit_count()
+                if distance < best_distance:
+                    best_hash, best_distance = cached_hash, distance
+
+        if best_hash is None:
+            self.misses += 1
+            return None
+
+        row = self._connection.execute(
+            "SELECT description FROM descriptions WHERE fingerprint = ? AND phash = ?",
+            (self.fingerprint, _to_signed(best_hash))
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self._connection.execute(
+            "UPDATE descriptions SET last_used = ? WHERE fingerprint = ? AND phash = ?",
+            (time.time(), self.fingerprint, _to_signed(best_hash))
+        )
+        if best_distance == 0:
+            self.exact_hits += 1
+        else:
+            self.near_hits += 1
+        return row[0]
+
+    def store(self, phash: int | None, description: str):
+        """Saves a description under the image's hash and evicts the least recently used overflow."""
+        if phash is None:
+            return
+        self._connection.execute(
+            "INSERT OR REPLACE INTO descriptions (fingerprint, phash, description, last_used) VALUES (?, ?, ?, ?)",
+            (self.fingerprint, _to_signed(phash), description, time.time())
+        )
+        self._index(phash)
+        self._evict()
+        self._wrote()
+
+    def _evict(self):
+        overflow = len(self._hashes) - self.max_entries
+        if overflow <= 0:
+            return
+        evicted = [
+            _to_unsigned(row[0]) for row in self._connection.execute(
+                "SELECT phash FROM descriptions WHERE fingerprint = ? ORDER BY last_used ASC LIMIT ?",
+                (self.fingerprint, overflow)
+            )
+        ]
+        self._connection.executemany(
+            "DELETE FROM descriptions WHERE fingerprint = ? AND phash = ?",
+            [(self.fingerprint, _to_signed(value)) for value in evicted]
+        )
+        for value in evicted:
+            self._unindex(value)
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+    def report(self) -> str:
+        lookups = self.exact_hits + self.near_hits + self.misses
+        hit_rate = ((self.exact_hits + self.near_hits) / lookups * 100) if lookups else 0.0
+        return (f"Image description cache: {self.exact_hits} exact hits, {self.near_hits} near-duplicate hits, "
+                f"{self.misses} misses ({hit_rate:.1f}% hit rate, max distance {self.max_distance})")
+
+
+def get_image_cache(ingestion_config: dict, project_root: str, fingerprint: str) -> ImageDescriptionCache | None:
+    """
+    Opens the cache at 'ingestion.image_cache_path', scoped to the describer fingerprint,
+    or returns None if it isn't configured.
+    """
+    db_path = ingestion_config.get('image_cache_path')
+    if not db_path:
+        return None
+    return ImageDescriptionCache(
+        os.path.join(project_root, db_path),
+        fingerprint,
+        max_entries=int(ingestion_config.get('image_cache_max_entries', 20000)),
+        max_distance=int(ingestion_config.get('image_cache_max_distance', 6)),
+    )
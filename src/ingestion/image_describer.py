@@ -0,0 +1,188 @@
+# src/ingestion/image_describer.py
+
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from src.ingestion.image_cache import ImageDescriptionCache, describer_fingerprint, get_image_cache, perceptual_hash
+
+import google.generativeai as genai
+from google.generativeai.types import HarmCategory, HarmBlockThreshold
+import streamlit as st
+
+IMAGE_PROMPT = (
+    "Describe this image from a user manual in detail. Focus on any text, buttons, "
+    "or interface elements shown. What is the user meant to do here?\n"
+)
+
+# Signature of a describe function: (image_bytes, mime_type) -> description text.
+# It should raise on failure so the describer can retry.
+DescribeFn = Callable[[bytes, str], str]
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at least 1/requests_per_second apart."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ImageDescriber:
+    """
+    Describes images with a bounded number of concurrent, rate-limited model calls.
+    Failed calls are retried with exponential backoff, and byte-identical images are
+    only described once per describer instance (i.e. once per build). With a cache,
+    near-duplicate images from earlier builds reuse their stored description.
+    """
+
+    def __init__(self, describe_fn: DescribeFn, max_concurrency: int = 4, requests_per_second: float = 1.0,
+                 max_retries: int = 3, backoff_seconds: float = 2.0, cache: ImageDescriptionCache | None = None):
+        self.describe_fn = describe_fn
+        self.cache = cache
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._descriptions = {}
+        self._stats_lock = threading.Lock()
+        self.requested = 0
+        self.described = 0
+        self.failed = 0
+
+    def _describe_with_retry(self, image_bytes: bytes, mime_type: str) -> tuple[str, bool]:
+        """Returns (description text, succeeded)."""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                description = self.describe_fn(image_bytes, mime_type)
+                with self._stats_lock:
+                    self.described += 1
+                return f"[Image Description: {description}]", True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    with self._stats_lock:
+                        self.failed += 1
+                    return f"[Image Description: Error processing image - {e}]", False
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.25)
+                print(f"  - Image description failed ({e}); retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+    def describe_many(self, images: list[tuple[bytes, str]]) -> list[str]:
+        """
+        Describes a batch of (image_bytes, mime_type) pairs concurrently.
+        Returns the descriptions in the same order as the input.
+        """
+        self.requested += len(images)
+        keys = [hashlib.sha256(image_bytes).hexdigest() for image_bytes, _ in images]
+
+        pending = {}
+        for key, image in zip(keys, images):
+            if key in self._descriptions or key in pending:
+                continue
+            if self.cache is not None:
+                phash = perceptual_hash(image[0])
+                cached = self.cache.lookup(phash)
+                if cached is not None:
+                    self._descriptions[key] = cached
+                    continue
+            pending[key] = image
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as pool:
+                futures = {
+                    key: pool.submit(self._describe_with_retry, image_bytes, mime_type)
+                    for key, (image_bytes, mime_type) in pending.items()
+                }
+                for key, future in futures.items():
+                    description, succeeded = future.result()
+                    self._descriptions[key] = description
+                    # Errors aren't cached so the next build retries them
+                    if succeeded and self.cache is not None:
+                        self.cache.store(perceptual_hash(pending[key][0]), description)
+
+        return [self._descriptions[key] for key in keys]
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+    def report(self) -> str:
+        reused = self.requested - self.described - self.failed
+        report = (f"Image descriptions: {self.requested} images, {self.described} described, "
+                  f"{reused} reused, {self.failed} failed")
+        if self.cache is not None:
+            report += f"\n{self.cache.report()}"
+        return report
+
+
+def gemini_vision_describe_fn(api_key: str, model_name: str) -> DescribeFn:
+    """Returns a describe function backed by one shared, pre-configured Gemini Vision client."""
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(model_name)
+
+    def describe(image_bytes: bytes, mime_type: str) -> str:
+        response = model.generate_content(
+            [IMAGE_PROMPT, {"mime_type": mime_type, "data": image_bytes}],
+            # Block potentially sensitive content for safety
+            safety_settings={
+                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+            }
+        )
+        return response.text
+
+    return describe
+
+
+def stub_describe_fn(image_bytes: bytes, mime_type: str) -> str:
+    """Deterministic local stand-in for the Vision model, for offline builds and tests."""
+    return f"stub description of {mime_type} image {hashlib.sha256(image_bytes).hexdigest()[:12]} ({len(image_bytes)} bytes)"
+
+
+def _resolve_api_key(config: dict) -> str | None:
+    """Prefers the API key from Streamlit secrets and falls back to the config file."""
+    try:
+        if "API_KEY" in st.secrets:
+            return st.secrets["API_KEY"]
+    except Exception:
+        # No secrets.toml available (e.g. when building from the command line)
+        pass
+    return config.get('gemini', {}).get('api_key')
+
+
+def get_image_describer(config: dict, project_root: str | None = None) -> ImageDescriber:
+    """Builds the describer from the 'ingestion' settings ('vision_model: local-stub' for offline use)."""
+    ingestion_config = config.get('ingestion', {})
+    model_name = ingestion_config.get('vision_model', 'gemini-pro-vision')
+    if model_name == 'local-stub':
+        describe_fn = stub_describe_fn
+    else:
+        api_key = _resolve_api_key(config)
+        if not api_key:
+            raise ValueError("API Key not found in Streamlit secrets or config for image descriptions.")
+        describe_fn = gemini_vision_describe_fn(api_key, model_name)
+
+    return ImageDescriber(
+        describe_fn,
+        max_concurrency=int(ingestion_config.get('vision_concurrency', 4)),
+        requests_per_second=float(ingestion_config.get('vision_requests_per_second', 1.0)),
+        max_retries=int(ingestion_config.get('vision_max_retries', 3)),
+        backoff_seconds=float(ingestion_config.get('vision_backoff_seconds', 2.0)),
+        cache=get_image_cache(ingestion_config, project_root, describer_fingerprint(model_name, IMAGE_PROMPT))
+        if project_root else None,
+    )
@@ -0,0 +1,106 @@
+# src/ingestion/image_preprocess.py
+
+import io
+
+from PIL import Image, ImageStat
+
+# Magic-byte signatures of the formats unstructured can hand us
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+]
+
+# Formats the Vision model accepts as-is
+SUPPORTED_MIME_TYPES = {'image/png', 'image/jpeg', 'image/webp'}
+
+_OUTPUT_MIME_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg', 'PNG': 'image/png'}
+
+
+def sniff_mime_type(image_bytes: bytes) -> str | None:
+    """Detects the real image format from its leading bytes, or None if it isn't recognised."""
+    if image_bytes[:4] == b'RIFF' and image_bytes[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, mime_type in _SIGNATURES:
+        if image_bytes.startswith(signature):
+            return mime_type
+    return None
+
+
+class ImagePreprocessor:
+    """
+    Shrinks images before they are sent to the Vision model.
+
+    Images are downscaled so their longest edge is at most max_edge and re-encoded in
+    output_format, unless the original is already smaller and in a supported format.
+    Icons, separators and blank images (tiny or nearly uniform) are skipped entirely.
+    """
+
+    def __init__(self, max_edge: int = 1024, output_format: str = 'WEBP', quality: int = 80,
+                 min_edge: int = 32, min_stddev: float = 4.0):
+        self.max_edge = max_edge
+        self.output_format = output_format.upper()
+        self.quality = quality
+        self.min_edge = min_edge
+        self.min_stddev = min_stddev
+        self.processed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def prepare(self, image_bytes: bytes) -> tuple[bytes, str] | None:
+        """Returns (payload, mime_type) to send, or None if the image should be skipped."""
+        self.bytes_in += len(image_bytes)
+        original_mime = sniff_mime_type(image_bytes)
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                image.load()
+                if min(image.size) < self.min_edge or self._is_blank(image):
+                    self.skipped += 1
+                    return None
+
+                image = image.convert('RGB')
+                if max(image.size) > self.max_edge:
+                    image.thumbnail((self.max_edge, self.max_edge), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                image.save(buffer, format=self.output_format, quality=self.quality)
+                payload, mime_type = buffer.getvalue(), _OUTPUT_MIME_TYPES.get(self.output_format, 'image/webp')
+        except Exception as e:
+            # Undecodable images are passed through untouched and left to the model
+            print(f"  - Could not preprocess image ({e}); sending it as-is.")
+            self.processed += 1
+            self.bytes_out += len(image_bytes)
+            return image_bytes, original_mime or 'image/jpeg'
+
+        # Keep the original when re-encoding doesn't help and the model accepts it
+        if original_mime in SUPPORTED_MIME_TYPES and len(image_bytes) <= len(payload):
+            payload, mime_type = image_bytes, original_mime
+
+        self.processed += 1
+        self.bytes_out += len(payload)
+        return payload, mime_type
+
+    def _is_blank(self, image: Image.Image) -> bool:
+        return ImageStat.Stat(image.convert('L')).stddev[0] < self.min_stddev
+
+    def report(self) -> str:
+        saved = self.bytes_in - self.bytes_out
+        percent = (saved / self.bytes_in * 100) if self.bytes_in else 0.0
+        return (f"Image preprocessing: {self.processed} sent, {self.skipped} skipped as tiny/blank, "
+                f"{self.bytes_in / 1024:.0f} KiB -> {self.bytes_out / 1024:.0f} KiB "
+                f"({saved / 1024:.0f} KiB / {percent:.1f}% saved)")
+
+
+def get_image_preprocessor(ingestion_config: dict) -> ImagePreprocessor:
+    """Builds the preprocessor from the 'ingestion.image_*' settings."""
+    return ImagePreprocessor(
+        max_edge=int(ingestion_config.get('image_max_edge', 1024)),
+        output_format=ingestion_config.get('image_format', 'WEBP'),
+        quality=int(ingestion_config.get('image_quality', 80)),
+        min_edge=int(ingestion_config.get('image_min_edge', 32)),
+        min_stddev=float(ingestion_config.get('image_min_stddev', 4.0)),
+    )
@@ -0,0 +1,125 @@
+# src/ingestion/partition_cache.py
+
+import gzip
+import hashlib
+import json
+import os
+
+import unstructured
+from unstructured.staging.base import elements_from_json, elements_to_json
+
+
+class PartitionCache:
+    """
+    On-disk cache of partition_pdf results, stored as gzipped element JSON.
+
+    Entries are keyed by the PDF content hash, the page range, the parsing strategy,
+    the image flag and the installed unstructured version, so any change to the inputs
+    of partition_pdf produces a new key. Least recently used entries are evicted once
+    the cache grows beyond max_bytes.
+
+    The per-page strategies chosen by the 'adaptive' classification are cached alongside,
+    keyed by the PDF content hash and the classifier version.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(file_hash: str, first_page: int, last_page: int, strategy: str, process_images: bool) -> str:
+        raw = f"{file_hash}|{first_page}-{last_page}|{strategy}|{int(bool(process_images))}|{unstructured.__version__}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def get(self, key: str) -> list | None:
+        """Returns the cached elements for the key, or None on a miss."""
+        entry_path = self._entry_path(key)
+        try:
+            with gzip.open(entry_path, 'rt', encoding='utf-8') as f:
+                elements = elements_from_json(text=f.read())
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, json.JSONDecodeError) as e:
+            # A corrupt entry is treated as a miss and rebuilt
+            print(f"  - Discarding unreadable partition cache entry {key[:12]}: {e}")
+            os.remove(entry_path)
+            self.misses += 1
+            return None
+
+        # Refresh the access time used for LRU eviction
+        os.utime(entry_path)
+        self.hits += 1
+        return elements
+
+    def put(self, key: str, elements: list):
+        """Stores the elements under the key and evicts old entries if the cache is over budget."""
+        entry_path = self._entry_path(key)
+        temp_path = entry_path + ".tmp"
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            f.write(elements_to_json(elements))
+        os.replace(temp_path, entry_path)
+        self._evict()
+
+    def _strategies_path(self, file_hash: str, classifier_version: str) -> str:
+        key = hashlib.sha256(f"pages|{file_hash}|{classifier_version}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pages.json")
+
+    def get_page_strategies(self, file_hash: str, classifier_version: str) -> list[str] | None:
+        """Returns the cached per-page strategies of a PDF, or None if it hasn't been classified."""
+        entry_path = self._strategies_path(file_hash, classifier_version)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                strategies = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"  - Discarding unreadable page classification {os.path.basename(entry_path)[:12]}: {e}")
+            os.remove(entry_path)
+            return None
+        os.utime(entry_path)
+        return strategies
+
+    def put_page_strategies(self, file_hash: str, classifier_version: str, strategies: list[str]):
+        entry_path = self._strategies_path(file_hash, classifier_version)
+        with open(entry_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(strategies, f)
+        os.replace(entry_path + ".tmp", entry_path)
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith((".json.gz", ".pages.json")):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            self.evictions += 1
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return (f"Partition cache: {self.hits} hits, {self.misses} misses "
+                f"({hit_rate:.1f}% hit rate), {self.evictions} evictions")
+
+
+def get_partition_cache(ingestion_config: dict, project_root: str) -> PartitionCache | None:
+    """Builds the cache from 'ingestion.cache_dir' and 'ingestion.cache_max_mb', or None if disabled."""
+    cache_dir = ingestion_config.get('cache_dir')
+    if not cache_dir:
+        return None
+    max_mb = float(ingestion_config.get('cache_max_mb', 2048))
+    return PartitionCache(os.path.join(project_root, cache_dir), int(max_mb * 1024 * 1024))
@@ -1,56 +1,351 @@
 import os
 import yaml
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from typing import Iterator, NamedTuple
+from pypdf import PdfReader, PdfWriter
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTCurve, LTFigure, LTImage, LTLine, LTRect, LTTextContainer
 from unstructured.partition.pdf import partition_pdf
 from unstructured.documents.elements import Table, Title, Text
 from langchain.docstore.document import Document
 import base64
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-import google.generativeai as genai
-import streamlit as st # Import Streamlit
-
-# --- Placeholder for Gemini Vision Functionality ---
-# This function will describe an image using the Gemini Pro Vision model.
-def get_image_description(image_bytes: bytes) -> str:
-    """Uses Gemini Pro Vision to describe an image."""
-    
-    # Get the API key from Streamlit secrets instead of hardcoding it
-    # This assumes you have GEMINI_API_KEY set in your secrets.toml file
-    try:
-        api_key = st.secrets["API_KEY"]
-        genai.configure(api_key=api_key)
-    except KeyError:
-        return "[Image Description: Error - GEMINI_API_KEY not found in Streamlit secrets.]"
-    except Exception as e:
-        return f"[Image Description: Error configuring Gemini - {e}]"
-
-
-    image_parts = [{"mime_type": "image/jpeg", "data": image_bytes}]
-    prompt_parts = [
-        "Describe this image from a user manual in detail. Focus on any text, buttons, or interface elements shown. What is the user meant to do here?\n",
-        *image_parts
-    ]
-    
+from src.ingestion.image_describer import ImageDescriber, get_image_describer
+from src.ingestion.image_preprocess import ImagePreprocessor, get_image_preprocessor, sniff_mime_type
+from src.ingestion.partition_cache import PartitionCache, get_partition_cache
+from src.utils.hashing import hash_file
+
+# --- DEFINE PROJECT ROOT for reliable file paths ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# --- Gemini Vision Functionality ---
+# Builds use a shared, rate-limited ImageDescriber (see image_describer.py);
+# this helper is kept for describing a single image outside of a build.
+_single_image_describer = None
+_single_image_describer_key = None
+_single_image_describer_lock = threading.Lock()
+
+
+def get_image_description(image_bytes: bytes, config: dict | None = None) -> str:
+    """Uses Gemini Pro Vision to describe an image, reusing one describer per configuration."""
+    global _single_image_describer, _single_image_describer_key
+    config = config or {}
+    key = repr((config.get('ingestion'), config.get('gemini')))
+    with _single_image_describer_lock:
+        if _single_image_describer is None or _single_image_describer_key != key:
+            try:
+                _single_image_describer = get_image_describer(config)
+            except Exception as e:
+                return f"[Image Description: Error configuring Gemini - {e}]"
+            _single_image_describer_key = key
+        describer = _single_image_describer
+    return describer.describe_many([(image_bytes, sniff_mime_type(image_bytes) or "image/jpeg")])[0]
+
+
+class PartitionTask(NamedTuple):
+    """One unit of partitioning work: an inclusive, 1-based page range of a single PDF and its strategy."""
+    file: str
+    path: str
+    first_page: int
+    last_page: int
+    page_count: int
+    strategy: str
+
+    @property
+    def is_whole_file(self) -> bool:
+        return self.first_page == 1 and self.last_page >= self.page_count
+
+
+def list_pdf_files(pdf_folder_path: str) -> list[str]:
+    """Returns the PDF file names in the folder, in the sorted order used for ingestion."""
+    return sorted(f for f in os.listdir(pdf_folder_path) if f.endswith('.pdf'))
+
+
+# Pages with less extractable text than this are treated as scanned and need OCR
+ADAPTIVE_MIN_TEXT_CHARS = 50
+# Ruling lines/rectangles on a page above which it probably contains a table
+ADAPTIVE_TABLE_RULE_COUNT = 8
+# Images covering less than this fraction of the page (logos, icons, bullets) don't need hi_res
+ADAPTIVE_MIN_IMAGE_AREA_RATIO = 0.02
+# Identifies the classification rules, so cached per-page strategies are redone when they change
+ADAPTIVE_CLASSIFIER_VERSION = f"1|{ADAPTIVE_MIN_TEXT_CHARS}|{ADAPTIVE_TABLE_RULE_COUNT}|{ADAPTIVE_MIN_IMAGE_AREA_RATIO}"
+
+
+def _page_needs_layout(layout_objects) -> bool:
+    """
+    Decides from a pdfminer page layout whether the page needs 'hi_res' partitioning:
+    it has a sizeable image, looks like it has a table, or has no usable text layer.
+    """
+    page_area = getattr(layout_objects, 'width', 0) * getattr(layout_objects, 'height', 0)
+    text_chars = 0
+    rule_count = 0
+    pending = list(layout_objects)
+    while pending:
+        obj = pending.pop()
+        if isinstance(obj, LTImage):
+            # Without a page size to compare against, every image counts
+            if not page_area or obj.width * obj.height >= ADAPTIVE_MIN_IMAGE_AREA_RATIO * page_area:
+                return True
+            continue
+        if isinstance(obj, LTFigure):
+            pending.extend(obj)
+        elif isinstance(obj, LTTextContainer):
+            text_chars += len(obj.get_text().strip())
+        elif isinstance(obj, (LTRect, LTLine, LTCurve)):
+            rule_count += 1
+    return rule_count >= ADAPTIVE_TABLE_RULE_COUNT or text_chars < ADAPTIVE_MIN_TEXT_CHARS
+
+
+def _classify_pages(pdf_path: str) -> list[str]:
+    """
+    Runs a cheap pdfminer pass over the file and picks 'fast' or 'hi_res' for every page.
+    This is the same layout analysis Scripts/pdf2txt.py uses, without rendering anything.
+    Kept at module level so it can run on pool workers.
+    """
+    strategies = []
+    for page_layout in extract_pages(pdf_path):
+        strategies.append('hi_res' if _page_needs_layout(page_layout) else 'fast')
+    fast_pages = strategies.count('fast')
+    print(f"Adaptive parsing: {fast_pages}/{len(strategies)} pages of {pdf_path} take the fast path.")
+    return strategies
+
+
+def _classify_files(pdf_paths: list[str], ingestion_config: dict, cache: PartitionCache | None,
+                    file_hashes: dict[str, str]) -> dict[str, list[str]]:
+    """
+    Per-page strategies of every file: taken from the partition cache for files classified
+    before, the rest classified in parallel on up to 'ingestion.workers' processes.
+    """
+    strategies = {}
+    if cache is not None:
+        for path in pdf_paths:
+            if path not in file_hashes:
+                file_hashes[path] = hash_file(path)
+            cached = cache.get_page_strategies(file_hashes[path], ADAPTIVE_CLASSIFIER_VERSION)
+            if cached is not None:
+                strategies[path] = cached
+
+    missing = [path for path in pdf_paths if path not in strategies]
+    workers = _resolve_worker_count(ingestion_config, len(missing))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            classified = list(pool.map(_classify_pages, missing))
+    else:
+        classified = [_classify_pages(path) for path in missing]
+    for path, page_strategies in zip(missing, classified):
+        strategies[path] = page_strategies
+        if cache is not None:
+            cache.put_page_strategies(file_hashes[path], ADAPTIVE_CLASSIFIER_VERSION, page_strategies)
+    return strategies
+
+
+def _plan_partition_tasks(pdf_folder_path: str, pages_per_task: int, strategy: str,
+                          files: list[str] | None = None, ingestion_config: dict | None = None,
+                          cache: PartitionCache | None = None,
+                          file_hashes: dict[str, str] | None = None) -> list[PartitionTask]:
+    """
+    Splits every PDF in the folder (or only the given files) into page-range tasks,
+    in sorted filename and page order. A pages_per_task of 0 keeps each file as a single task.
+    With the 'adaptive' strategy, ranges are also cut wherever the per-page strategy changes.
+    """
+    selected = set(files) if files is not None else None
+    plan_files = [file for file in list_pdf_files(pdf_folder_path) if selected is None or file in selected]
+    page_strategies_by_path = {}
+    if strategy == 'adaptive':
+        page_strategies_by_path = _classify_files(
+            [os.path.join(pdf_folder_path, file) for file in plan_files], ingestion_config or {}, cache,
+            file_hashes if file_hashes is not None else {},
+        )
+
+    tasks = []
+    for file in plan_files:
+        pdf_path = os.path.join(pdf_folder_path, file)
+        page_count = len(PdfReader(pdf_path).pages)
+        if strategy == 'adaptive':
+            page_strategies = page_strategies_by_path[pdf_path]
+        else:
+            page_strategies = [strategy] * page_count
+        if not page_strategies:
+            page_strategies = [strategy if strategy != 'adaptive' else 'hi_res']
+
+        step = pages_per_task if pages_per_task > 0 else len(page_strategies)
+        first_page = 1
+        for page in range(2, len(page_strategies) + 2):
+            range_full = page - first_page >= step
+            if page > len(page_strategies) or range_full or page_strategies[page - 1] != page_strategies[first_page - 1]:
+                tasks.append(PartitionTask(file, pdf_path, first_page, page - 1,
+                                           page_count, page_strategies[first_page - 1]))
+                first_page = page
+    return tasks
+
+
+def _write_page_range(pdf_path: str, first_page: int, last_page: int) -> str:
+    """Copies the given pages into a temporary PDF and returns its path."""
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    for page_index in range(first_page - 1, last_page):
+        writer.add_page(reader.pages[page_index])
+    handle, temp_path = tempfile.mkstemp(suffix='.pdf')
+    with os.fdopen(handle, 'wb') as f:
+        writer.write(f)
+    return temp_path
+
+
+def _partition_task(task: PartitionTask, process_images_flag: bool) -> list:
+    """
+    Runs unstructured's partition_pdf on one task and returns its elements with
+    page numbers relative to the original file.
+    Kept at module level so it can be pickled and shipped to pool workers.
+    """
+    if task.is_whole_file:
+        print(f"Processing {task.path} with strategy '{task.strategy}'...")
+        partition_path = task.path
+    else:
+        print(f"Processing {task.path} pages {task.first_page}-{task.last_page} with strategy '{task.strategy}'...")
+        partition_path = _write_page_range(task.path, task.first_page, task.last_page)
+
     try:
-        model = genai.GenerativeModel('gemini-pro-vision')
-        response = model.generate_content(
-            prompt_parts,
-            # Block potentially sensitive content for safety
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-            }
+        elements = partition_pdf(
+            filename=partition_path,
+            strategy=task.strategy,
+            infer_table_structure=True, # Important for table quality
+            extract_images_in_pdf=process_images_flag, # Only extract images if flag is True
+            # Keep image bytes on the element so ranges don't overwrite each other's figure files
+            extract_image_block_to_payload=process_images_flag,
         )
-        return f"[Image Description: {response.text}]"
-    except Exception as e:
-        return f"[Image Description: Error processing image - {e}]"
+    finally:
+        if partition_path != task.path:
+            os.remove(partition_path)
+
+    page_offset = task.first_page - 1
+    if page_offset:
+        for element in elements:
+            element.metadata.page_number = (element.metadata.page_number or 1) + page_offset
+    return elements
 
 
-def load_and_process_pdfs(pdf_folder_path: str, config: dict) -> list[Document]:
+def _element_image_bytes(element) -> bytes | None:
+    """Returns the raw image bytes of an Image element, from its payload or its extracted file."""
+    image_base64 = getattr(element.metadata, 'image_base64', None)
+    if image_base64:
+        return base64.b64decode(image_base64)
+    image_path = getattr(element.metadata, 'image_path', None)
+    if image_path and os.path.exists(image_path):
+        with open(image_path, 'rb') as f:
+            return f.read()
+    return getattr(element, 'image_bytes', None)
+
+
+def _resolve_worker_count(ingestion_config: dict, task_count: int) -> int:
+    """Reads 'ingestion.workers' (0 means one per CPU) and caps it at the number of tasks."""
+    workers = int(ingestion_config.get('workers', 1) or 0)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, task_count))
+
+
+def _partition_results(tasks: list[PartitionTask], process_images_flag: bool,
+                       pool: ProcessPoolExecutor | None, cache: PartitionCache | None,
+                       max_in_flight: int = 1, file_hashes: dict[str, str] | None = None) -> Iterator[tuple]:
+    """
+    Yields (task, elements) in task order, serving tasks from the partition cache where possible.
+    Misses run on the pool when one is given, otherwise inline. At most max_in_flight tasks are
+    submitted or loaded ahead of the consumer, so only that many page ranges of partitioned
+    elements are ever held in memory at once.
     """
-    Loads and processes PDFs using the 'unstructured' library, handling text and tables.
+    file_hashes = file_hashes if file_hashes is not None else {}
+    pending = deque()
+    upcoming = iter(tasks)
+
+    def read_ahead():
+        for task in upcoming:
+            key = None
+            cached = None
+            if cache is not None:
+                if task.path not in file_hashes:
+                    file_hashes[task.path] = hash_file(task.path)
+                key = PartitionCache.make_key(file_hashes[task.path], task.first_page, task.last_page, task.strategy, process_images_flag)
+                cached = cache.get(key)
+            future = pool.submit(_partition_task, task, process_images_flag) if pool is not None and cached is None else None
+            pending.append((task, key, cached, future))
+            if len(pending) >= max_in_flight:
+                return
+
+    read_ahead()
+    while pending:
+        task, key, cached, future = pending.popleft()
+        # Keep the pool busy while this range is consumed
+        read_ahead()
+        if cached is not None:
+            print(f"Using cached partition of {task.path} pages {task.first_page}-{task.last_page}.")
+            yield task, cached
+            continue
+        elements = future.result() if future is not None else _partition_task(task, process_images_flag)
+        if cache is not None:
+            cache.put(key, elements)
+        yield task, elements
+
+
+def _element_text(element, image_description: str | None = None) -> str | None:
+    """Renders a single element as the text that goes into its page's document."""
+    # Image is a subclass of Text in unstructured, so it has to be checked first
+    if type(element).__name__ == 'Image':
+        return image_description + "\n" if image_description else None
+    if isinstance(element, Table):
+        # Format tables clearly for the LLM
+        return f"\n\n--- TABLE START ---\n{element.text}\n--- TABLE END ---\n\n"
+    if isinstance(element, Title):
+        return f"\n## {element.text}\n\n"
+    if isinstance(element, Text):
+        return element.text + "\n"
+    return None
+
+
+def _iter_rendered_elements(task_results, describer: ImageDescriber | None,
+                            preprocessor: ImagePreprocessor | None) -> Iterator[tuple]:
+    """
+    Yields (element, text) for every element of a file's tasks, in order.
+    The images of each task are shrunk, filtered and then described together as one concurrent batch.
+    """
+    for task, elements in task_results:
+        descriptions = {}
+        if describer is not None:
+            images = []
+            for element in elements:
+                if type(element).__name__ != 'Image':
+                    continue
+                image_bytes = _element_image_bytes(element)
+                prepared = preprocessor.prepare(image_bytes) if image_bytes else None
+                if prepared:
+                    images.append((element, prepared))
+            if images:
+                print(f"  - Describing {len(images)} images from {task.file} pages {task.first_page}-{task.last_page}...")
+                texts = describer.describe_many([payload for _, payload in images])
+                descriptions = {id(element): text for (element, _), text in zip(images, texts)}
+
+        for element in elements:
+            yield element, _element_text(element, descriptions.get(id(element)))
+
+
+def iter_pdf_documents(pdf_folder_path: str, config: dict, files: list[str] | None = None,
+                       source_hashes: dict[str, str] | None = None) -> Iterator[Document]:
+    """
+    Lazily loads and processes PDFs using the 'unstructured' library, handling text and tables,
+    and yields one Document per page with 'source' and 'page' metadata.
     Optionally processes images using a multimodal model.
+    With 'ingestion.workers' > 1 the PDFs are partitioned in parallel on a process pool, and
+    'ingestion.pages_per_task' additionally splits large PDFs into page ranges. At most
+    2 * workers ranges are in flight, so memory is bounded per page range: a small
+    'pages_per_task' is what keeps it low for very large manuals.
+    A 'parsing_strategy' of 'adaptive' only sends pages with tables, sizeable images or no
+    text layer through 'hi_res' and parses the rest with 'fast'.
+    Documents are always yielded in sorted filename order and page order.
+    Pass 'files' to only load a subset of the folder (used by incremental rebuilds), and
+    'source_hashes' (file name -> SHA-256) when the caller already hashed the files.
     """
-    documents = []
     ingestion_config = config.get('ingestion', {})
     
     # The API key is now managed by Streamlit secrets, not passed via config
@@ -58,44 +353,57 @@ def load_and_process_pdfs(pdf_folder_path: str, config: dict) -> list[Document]:
     
     strategy = ingestion_config.get('parsing_strategy', 'fast')
     process_images_flag = ingestion_config.get('process_images', False)
+    pages_per_task = int(ingestion_config.get('pages_per_task', 0) or 0)
 
-    for file in os.listdir(pdf_folder_path):
-        if not file.endswith('.pdf'):
-            continue
-            
-        pdf_path = os.path.join(pdf_folder_path, file)
-        print(f"Processing {pdf_path} with strategy '{strategy}'...")
-        
-        # Use unstructured to partition the PDF
-        elements = partition_pdf(
-            filename=pdf_path,
-            strategy=strategy,
-            infer_table_structure=True, # Important for table quality
-            extract_images_in_pdf=process_images_flag, # Only extract images if flag is True
-        )
-        
-        page_content = ""
-        for element in elements:
-            if isinstance(element, Table):
-                # Format tables clearly for the LLM
-                page_content += "\n\n--- TABLE START ---\n"
-                page_content += element.text
-                page_content += "\n--- TABLE END ---\n\n"
-            elif isinstance(element, Title):
-                page_content += f"\n## {element.text}\n\n"
-            elif isinstance(element, Text):
-                page_content += element.text + "\n"
-            # This requires 'unstructured' with image extraction capabilities
-            elif process_images_flag and type(element).__name__ == 'Image':
-                print(f"  - Describing image on page {element.metadata.page_number}...")
-                # This function now uses the key from secrets directly
-                image_description = get_image_description(element.image_bytes)
-                page_content += image_description + "\n"
-
-        if page_content:
-            documents.append(Document(
-                page_content=page_content,
-                metadata={'source': file}
-            ))
-            
-    return documents
+    cache = get_partition_cache(ingestion_config, PROJECT_ROOT)
+    # Content hashes by path, shared by the classification and partition cache lookups
+    file_hashes = {os.path.join(pdf_folder_path, file): file_hash for file, file_hash in (source_hashes or {}).items()}
+
+    tasks = _plan_partition_tasks(pdf_folder_path, pages_per_task, strategy, files,
+                                  ingestion_config, cache, file_hashes)
+    workers = _resolve_worker_count(ingestion_config, len(tasks))
+
+    # This requires 'unstructured' with image extraction capabilities
+    describer = get_image_describer(config, PROJECT_ROOT) if process_images_flag else None
+    preprocessor = get_image_preprocessor(ingestion_config) if process_images_flag else None
+
+    # Partitioning is the expensive step, so it is the only one sent to the pool.
+    # Image descriptions stay in this process, running on the describer's thread pool.
+    pool = None
+    if workers > 1:
+        print(f"Partitioning {len(tasks)} page ranges on {workers} worker processes...")
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        # Results are consumed in task order and tasks are planned in file and page
+        # order, so stitching consecutive ranges is deterministic
+        results = _partition_results(tasks, process_images_flag, pool, cache, max_in_flight=2 * workers,
+                                     file_hashes=file_hashes)
+        for file, file_results in groupby(results, key=lambda result: result[0].file):
+            rendered = _iter_rendered_elements(file_results, describer, preprocessor)
+            for page_number, page_items in groupby(rendered, key=lambda item: item[0].metadata.page_number):
+                # Collect the parts and join once, instead of re-copying the page on every element
+                page_content = "".join(text for _, text in page_items if text)
+                if page_content.strip():
+                    yield Document(
+                        page_content=page_content,
+                        metadata={'source': file, 'page': page_number}
+                    )
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if cache is not None:
+            print(cache.report())
+        if describer is not None:
+            print(preprocessor.report())
+            print(describer.report())
+            describer.close()
+
+
+def load_and_process_pdfs(pdf_folder_path: str, config: dict, files: list[str] | None = None,
+                          source_hashes: dict[str, str] | None = None) -> list[Document]:
+    """
+    Loads and processes PDFs into a list of page-level Documents.
+    See iter_pdf_documents for the streaming version.
+    """
+    return list(iter_pdf_documents(pdf_folder_path, config, files, source_hashes))
@@ -5,17 +5,21 @@ import streamlit as st
 import yaml
 import sys
 import os
-from thefuzz import process
 
 # --- System Path Setup ---
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(PROJECT_ROOT)
 
 # --- Backend Imports ---
-from src.ingestion.excel_parser import parse_excel_qa
+from src.ingestion.excel_parser import load_faq_table
+from src.bot_engine.faq_router import FaqRouter, get_faq_router
+from src.bot_engine.faq_reload import FaqWatcher
 from src.bot_engine.gemini_responder import get_rag_chain
 # We now only need this one function for the vector store
-from src.vector_store.vector_builder import get_or_create_vector_store
+from src.vector_store.vector_builder import get_or_create_vector_store, load_knowledge_base, resolve_vector_store_path
+from src.vector_store.hybrid_retriever import get_retriever
+from src.vector_store.snapshots import SnapshotWatcher, current_snapshot
+from src.bot_engine.hot_swap import HotSwapRef
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Document & FAQ Chatbot", layout="wide")
@@ -67,17 +71,21 @@ def load_all_resources():
         st.error("Failed to load or build the vector store. App cannot continue.")
         st.stop()
     
-    retriever = vector_store.as_retriever(search_kwargs={"k": 7})
+    vector_store_path = resolve_vector_store_path(config)
+    retriever = get_retriever(vector_store, config, k=7, vector_store_path=vector_store_path)
     print("Retriever created successfully.")
 
     # --- 3. Load other resources ---
-    faq_data = None
+    faq_router = None
     rag_chain = None
 
     try:
         excel_path = os.path.join(PROJECT_ROOT, config['data']['excel_path'])
-        faq_data = parse_excel_qa(excel_path)
-        print(f"FAQ Data Loaded: {'SUCCESS' if faq_data is not None else 'FAILED'}")
+        faq_data = load_faq_table(excel_path)
+        # The matching indexes are built once here instead of scanning every question per message
+        if faq_data is not None:
+            faq_router = get_faq_router(faq_data, config, PROJECT_ROOT)
+        print(f"FAQ Data Loaded: {'SUCCESS' if faq_router is not None else 'FAILED'}")
     except Exception as e:
         print(f"FAQ Data Loaded: FAILED with an exception: {e}")
 
@@ -88,28 +96,57 @@ def load_all_resources():
         print(f"RAG Chain Loaded: FAILED with an exception: {e}")
     
     # --- Final Check ---
-    if faq_data is None or retriever is None or rag_chain is None:
+    if faq_router is None or retriever is None or rag_chain is None:
         st.error("Failed to load one or more resources. Please check terminal logs for details.")
         st.stop()
         
+    # --- 4. Hot-swap newly published knowledge base snapshots ---
+    vector_store_root = os.path.join(PROJECT_ROOT, config['data']['vector_store_path'])
+    loaded_version = current_snapshot(vector_store_root)
+    knowledge_base = HotSwapRef((retriever, rag_chain), version=loaded_version)
+    vector_store_config = config.get('vector_store', {})
+    if vector_store_config.get('snapshots', False):
+        def swap_in_snapshot(version: str, path: str):
+            nonlocal vector_store
+            # Built off the request path; sessions pick up the new chain on their next message
+            new_store = load_knowledge_base(config, path)
+            new_retriever = get_retriever(new_store, config, k=7, vector_store_path=path)
+            knowledge_base.swap((new_retriever, get_rag_chain(new_retriever)), version=version)
+            old_store, vector_store = vector_store, new_store
+            # Releases the shard search pool; requests still on the old chain search serially
+            if hasattr(old_store, 'close'):
+                old_store.close()
+            print(f"Knowledge base snapshot {version} is now live.")
+
+        SnapshotWatcher(
+            vector_store_root, loaded_version, swap_in_snapshot,
+            poll_seconds=float(vector_store_config.get('snapshot_poll_seconds', 30))
+        ).start()
+        
+    # --- 5. Reload the FAQ workbook when it is edited, without touching the knowledge base ---
+    faq = HotSwapRef(faq_router)
+    faq_config = config.get('faq', {})
+    if faq_config.get('live_reload', True):
+        FaqWatcher(
+            excel_path, faq, faq_data, config, PROJECT_ROOT,
+            poll_seconds=float(faq_config.get('reload_poll_seconds', 10))
+        ).start()
+        
     print("--- ALL RESOURCES LOADED SUCCESSFULLY ---\n")
-    return faq_data, retriever, rag_chain
+    return faq, knowledge_base
 
 # --- Load all resources and assign them to variables ---
-faq_data, retriever, rag_chain = load_all_resources()
+faq, knowledge_base = load_all_resources()
 
 # --- [The rest of your app.py (Chat Logic, UI State, Main Interaction) is correct and can remain the same] ---
-def get_faq_answer(query: str, faqs: list[dict]) -> str or None:
-    if not faqs: return None
-    faq_questions = [item['user_desc'] for item in faqs]
-    best_match = process.extractOne(query, faq_questions, score_cutoff=90)
+def get_faq_answer(query: str, router: FaqRouter) -> str or None:
+    if not router: return None
+    best_match = router.route(query)
+    print(router.report())
     
     if best_match:
-        best_matching_question_text = best_match[0]
-        for item in faqs:
-            if item['user_desc'] == best_matching_question_text:
-                print(f"FAQ Match Found: '{query}' -> '{best_matching_question_text}' (Score: {best_match[1]})")
-                return item['user_reply_desc']
+        print(f"FAQ Match Found ({best_match.tier}): '{query}' -> '{best_match.question}' (Score: {best_match.score:.2f})")
+        return best_match.answer
     return None
 
 if 'messages' not in st.session_state:
@@ -126,12 +163,14 @@ if prompt := st.chat_input("Ask your question..."):
 
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
-            faq_answer = get_faq_answer(prompt, faq_data)
+            faq_answer = get_faq_answer(prompt, faq.get())
             
             if faq_answer:
                 response = f"**From FAQ:**\n\n{faq_answer}"
             else:
                 st.info("No FAQ match found. Searching documents...")
+                # Take one reference for the whole request, so a hot-swap can't change it mid-answer
+                _, rag_chain = knowledge_base.get()
                 response = rag_chain.invoke(prompt)
                 response = response.replace("<br><br>", "\n\n")
             # Replace any single <br> with a single newline
@@ -0,0 +1,12 @@
+# src/utils/hashing.py
+
+import hashlib
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 hex digest of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
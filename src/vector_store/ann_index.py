@@ -0,0 +1,285 @@
+# src/vector_store/ann_index.py
+
+import math
+import os
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+QUANTIZATION_TYPES = ("none", "float16", "int8", "pq")
+SHARDING_TYPES = ("none", "source")
+# Index types whose vectors can be removed in place, which incremental updates rely on. LangChain's
+# FAISS.delete renumbers positions 0..n-1, which only matches indexes that compact on remove_ids
+# (IndexFlat and the flat quantized codes). IVF keeps the old ids and would hand out colliding ones.
+REMOVABLE_INDEX_TYPES = ("flat",)
+
+_SCALAR_QUANTIZERS = {"float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Number of queries used to measure the recall of a quantized index at build time
+RECALL_SAMPLE_QUERIES = 200
+RECALL_K = 7
+# Embedded recall query files, keyed by (path, mtime, embedding model object), so shards share them
+_recall_query_cache = {}
+
+
+def index_settings(vector_store_config: dict) -> dict:
+    """The build-time index settings, with defaults filled in. Stored in the manifest."""
+    index_type = vector_store_config.get('index_type', 'flat')
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector_store.index_type '{index_type}', expected one of {INDEX_TYPES}")
+    quantization = vector_store_config.get('quantization', 'none')
+    if quantization not in QUANTIZATION_TYPES:
+        raise ValueError(f"Unknown vector_store.quantization '{quantization}', expected one of {QUANTIZATION_TYPES}")
+    sharding = vector_store_config.get('sharding', 'none')
+    if sharding not in SHARDING_TYPES:
+        raise ValueError(f"Unknown vector_store.sharding '{sharding}', expected one of {SHARDING_TYPES}")
+    return {
+        "index_type": index_type,
+        "quantization": quantization,
+        "sharding": sharding,
+        "rerank": bool(vector_store_config.get('rerank', False)),
+        "ivf_nlist": int(vector_store_config.get('ivf_nlist', 0)),
+        "hnsw_m": int(vector_store_config.get('hnsw_m', 32)),
+        "hnsw_ef_construction": int(vector_store_config.get('hnsw_ef_construction', 200)),
+        "pq_m": int(vector_store_config.get('pq_m', 16)),
+        "pq_nbits": int(vector_store_config.get('pq_nbits', 8)),
+        "train_sample_size": int(vector_store_config.get('train_sample_size', 50000)),
+    }
+
+
+def supports_incremental_updates(settings: dict) -> bool:
+    """Whether chunks can be removed and added in place, instead of rebuilding the index."""
+    return settings["index_type"] in REMOVABLE_INDEX_TYPES and not settings["rerank"]
+
+
+def _ivf_nlist(settings: dict, vector_count: int) -> int:
+    """Uses the configured nlist, or ~4*sqrt(n); capped so every list gets enough training points."""
+    nlist = settings["ivf_nlist"] or int(4 * math.sqrt(vector_count))
+    return max(1, min(nlist, vector_count // 39 or 1))
+
+
+def _pq_m(settings: dict, dimension: int) -> int:
+    """PQ needs the sub-quantizer count to divide the dimension; step down to the nearest divisor."""
+    pq_m = max(1, min(settings["pq_m"], dimension))
+    while dimension % pq_m:
+        pq_m -= 1
+    return pq_m
+
+
+def _pq_nbits(settings: dict, vector_count: int) -> int:
+    """
+    2**nbits centroids per sub-quantizer need enough training points: fall back to 4 bits on
+    small corpora, and to floor(log2 n) on tiny ones (e.g. a one-page shard). 0 means too few
+    vectors to train PQ at all.
+    """
+    if vector_count >= 39 * (1 << settings["pq_nbits"]):
+        return settings["pq_nbits"]
+    return min(settings["pq_nbits"], 4, int(math.log2(vector_count)) if vector_count > 1 else 0)
+
+
+def _create_index(settings: dict, vector_count: int, dimension: int) -> faiss.Index:
+    """Creates the (untrained, empty) index for the index type and vector encoding in the settings."""
+    index_type = settings["index_type"]
+    quantization = settings["quantization"]
+    scalar_type = _SCALAR_QUANTIZERS.get(quantization)
+    pq_nbits = _pq_nbits(settings, vector_count)
+    if (quantization == "pq" or index_type == "ivfpq") and not pq_nbits:
+        print(f"Too few vectors ({vector_count}) to train PQ; storing them unquantized.")
+        quantization = "none"
+        index_type = "ivf" if index_type == "ivfpq" else index_type
+
+    if index_type == "flat":
+        if scalar_type is not None:
+            return faiss.IndexScalarQuantizer(dimension, scalar_type)
+        if quantization == "pq":
+            return faiss.IndexPQ(dimension, _pq_m(settings, dimension), pq_nbits)
+        return faiss.IndexFlatL2(dimension)
+
+    if index_type == "hnsw":
+        if scalar_type is not None:
+            index = faiss.IndexHNSWSQ(dimension, scalar_type, settings["hnsw_m"])
+        elif quantization == "pq":
+            index = faiss.IndexHNSWPQ(dimension, _pq_m(settings, dimension), settings["hnsw_m"], pq_nbits)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, settings["hnsw_m"])
+        index.hnsw.efConstruction = settings["hnsw_ef_construction"]
+        return index
+
+    nlist = _ivf_nlist(settings, vector_count)
+    quantizer = faiss.IndexFlatL2(dimension)
+    if index_type == "ivfpq" or quantization == "pq":
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, _pq_m(settings, dimension), pq_nbits)
+    if scalar_type is not None:
+        return faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, scalar_type)
+    return faiss.IndexIVFFlat(quantizer, dimension, nlist)
+
+
+def build_faiss_index(vectors: np.ndarray, vector_store_config: dict) -> faiss.Index:
+    """
+    Builds the index type selected by 'vector_store.index_type', storing vectors in the encoding
+    selected by 'vector_store.quantization', and adds all vectors to it.
+    Trainable indexes (IVF, PQ, scalar quantizers) are trained on a random sample of the vectors.
+    """
+    settings = index_settings(vector_store_config)
+    vector_count, dimension = vectors.shape
+    index = _create_index(settings, vector_count, dimension)
+
+    if not index.is_trained:
+        sample_size = min(vector_count, settings["train_sample_size"])
+        sample = vectors[np.random.default_rng(0).choice(vector_count, sample_size, replace=False)]
+        print(f"Training {settings['index_type']}/{settings['quantization']} index on {sample_size} of {vector_count} vectors...")
+        index.train(sample)
+
+    index.add(vectors)
+    apply_search_params(index, vector_store_config)
+    return index
+
+
+class RerankingIndex:
+    """
+    Wraps a (quantized) FAISS index and re-scores its top candidates with exact L2 distances
+    computed from full-precision vectors, which are typically a memory map of a file on disk.
+    Only search is supported, which is all a loaded knowledge base needs.
+    """
+
+    def __init__(self, base_index: faiss.Index, full_vectors: np.ndarray, candidates_factor: int = 4):
+        self.base_index = base_index
+        self.full_vectors = full_vectors
+        self.candidates_factor = max(1, candidates_factor)
+
+    @property
+    def d(self) -> int:
+        return self.base_index.d
+
+    @property
+    def ntotal(self) -> int:
+        return self.base_index.ntotal
+
+    def search(self, queries: np.ndarray, k: int):
+        _, candidates = self.base_index.search(queries, k * self.candidates_factor)
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, row_candidates) in enumerate(zip(queries, candidates)):
+            # Sorted positions keep reads from the memory-mapped file sequential
+            row_candidates = np.sort(row_candidates[row_candidates >= 0])
+            if not len(row_candidates):
+                continue
+            exact = ((np.asarray(self.full_vectors[row_candidates]) - query) ** 2).sum(axis=1)
+            order = np.argsort(exact)[:k]
+            distances[row, :len(order)] = exact[order]
+            labels[row, :len(order)] = row_candidates[order]
+        return distances, labels
+
+
+def unwrap_index(index) -> faiss.Index:
+    """Returns the underlying FAISS index of a possibly wrapped index."""
+    return index.base_index if isinstance(index, RerankingIndex) else index
+
+
+def load_recall_queries(vector_store_config: dict, embeddings) -> np.ndarray | None:
+    """
+    Embeds the real user questions in 'vector_store.recall_queries_path' (one per line, at
+    most RECALL_SAMPLE_QUERIES) for quantization_report, or returns None if it isn't set.
+    """
+    path = vector_store_config.get('recall_queries_path')
+    if not path:
+        return None
+    path = os.path.join(PROJECT_ROOT, path)
+    key = (path, os.stat(path).st_mtime_ns, id(embeddings))
+    if key not in _recall_query_cache:
+        with open(path, 'r', encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()][:RECALL_SAMPLE_QUERIES]
+        # embed_query, so the vectors are the ones real searches use
+        _recall_query_cache[key] = np.asarray([embeddings.embed_query(question) for question in questions], dtype=np.float32)
+    return _recall_query_cache[key]
+
+
+def _recall_at_k(index: faiss.Index, vectors: np.ndarray, queries: np.ndarray | None) -> tuple[float, str] | None:
+    """(recall@RECALL_K relative to exact float32 search, description of the queries used), or None."""
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    if queries is not None and len(queries):
+        _, truth = exact.search(queries, RECALL_K)
+        _, found = index.search(queries, RECALL_K)
+        hits = [len(set(f) & set(t)) / RECALL_K for f, t in zip(found, truth)]
+        return float(np.mean(hits)), f"{len(queries)} real queries"
+
+    # Leave-one-out: a sample of chunk embeddings serves as queries, and each one's own
+    # chunk is excluded from both result lists, so only its neighbours are compared
+    k = min(RECALL_K, vectors.shape[0] - 1)
+    if k < 1:
+        return None
+    rng = np.random.default_rng(1)
+    picks = rng.choice(vectors.shape[0], size=min(RECALL_SAMPLE_QUERIES, vectors.shape[0]), replace=False)
+    queries = vectors[picks]
+    _, truth = exact.search(queries, k + 1)
+    _, found = index.search(queries, k + 1)
+    hits = []
+    for pick, f, t in zip(picks, found, truth):
+        expected = [position for position in t if position != pick][:k]
+        returned = [position for position in f if position != pick][:k]
+        hits.append(len(set(returned) & set(expected)) / k)
+    return float(np.mean(hits)), f"{len(picks)} leave-one-out chunk queries"
+
+
+def quantization_report(index: faiss.Index, vectors: np.ndarray, settings: dict,
+                        queries: np.ndarray | None = None) -> str:
+    """
+    Reports bytes per vector, total serialized index size and recall@7 relative to exact
+    float32 search. Recall is measured on real query embeddings when given (see
+    load_recall_queries), otherwise on leave-one-out chunk embeddings.
+    """
+    index_bytes = len(faiss.serialize_index(unwrap_index(index)))
+    vector_count = max(1, vectors.shape[0])
+    report = (f"Index {settings['index_type']}/{settings['quantization']}: {index_bytes / vector_count:.1f} bytes per vector "
+              f"(float32: {vectors.shape[1] * 4}), {index_bytes / (1024 * 1024):.2f} MiB total")
+    if settings["quantization"] == "none" and settings["index_type"] == "flat":
+        return report
+
+    measured = _recall_at_k(index, vectors, queries)
+    if measured is None:
+        return report + ", recall not measured (too few chunks)"
+    recall, method = measured
+    return report + f", recall@{RECALL_K} {recall:.3f} ({(1 - recall) * 100:.1f}% loss vs float32 flat, {method})"
+
+
+def apply_search_params(index, vector_store_config: dict):
+    """Applies the query-time knobs ('ivf_nprobe', 'hnsw_ef_search', 'rerank_candidates'); these don't require a rebuild."""
+    if isinstance(index, RerankingIndex):
+        index.candidates_factor = max(1, int(vector_store_config.get('rerank_candidates', 4)))
+        index = index.base_index
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        ivf.nprobe = int(vector_store_config.get('ivf_nprobe', 8))
+
+    hnsw = getattr(index, 'hnsw', None)
+    if hnsw is not None:
+        hnsw.efSearch = int(vector_store_config.get('hnsw_ef_search', 64))
+
+
+def build_faiss_store(docs: list, ids: list[str], embeddings, config: dict) -> FAISS:
+    """
+    Embeds the chunks and wraps the configured FAISS index in a LangChain FAISS store,
+    equivalent to FAISS.from_documents but with control over the index type.
+    """
+    vector_store_config = config.get('vector_store', {})
+    settings = index_settings(vector_store_config)
+    vectors = np.asarray(embeddings.embed_documents([doc.page_content for doc in docs]), dtype=np.float32)
+    index = build_faiss_index(vectors, vector_store_config)
+    if settings["rerank"]:
+        index = RerankingIndex(index, vectors, int(vector_store_config.get('rerank_candidates', 4)))
+    print(quantization_report(index, vectors, settings, load_recall_queries(vector_store_config, embeddings)))
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, docs))),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
@@ -0,0 +1,165 @@
+# src/vector_store/chunker.py
+
+import re
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from src.vector_store.embedding_scheduler import estimate_tokens
+
+# Markers written by src/ingestion/pdf_loader.py
+TABLE_START = "--- TABLE START ---"
+TABLE_END = "--- TABLE END ---"
+HEADING_PREFIX = "## "
+
+CHUNKERS = ("recursive", "structure")
+
+_TABLE_PATTERN = re.compile(re.escape(TABLE_START) + r".*?" + re.escape(TABLE_END), re.DOTALL)
+
+
+def chunk_settings(vector_store_config: dict) -> dict:
+    """The chunking settings, with defaults filled in. Stored in the manifest."""
+    chunker = vector_store_config.get('chunker', 'recursive')
+    if chunker not in CHUNKERS:
+        raise ValueError(f"Unknown vector_store.chunker '{chunker}', expected one of {CHUNKERS}")
+    unit = vector_store_config.get('chunk_unit', 'chars')
+    if unit not in ('chars', 'tokens'):
+        raise ValueError(f"Unknown vector_store.chunk_unit '{unit}', expected 'chars' or 'tokens'")
+    return {
+        "chunker": chunker,
+        "chunk_size": int(vector_store_config.get('chunk_size', 2000)),
+        "chunk_overlap": int(vector_store_config.get('chunk_overlap', 300)),
+        "chunk_unit": unit,
+    }
+
+
+def _split_blocks(text: str) -> list[tuple[str, str]]:
+    """
+    Splits page text into ('heading' | 'table' | 'text', content) blocks, in order.
+    Tables are kept whole, including their markers.
+    """
+    blocks = []
+    position = 0
+    for match in _TABLE_PATTERN.finditer(text):
+        blocks.extend(_split_text_blocks(text[position:match.start()]))
+        blocks.append(("table", match.group(0)))
+        position = match.end()
+    blocks.extend(_split_text_blocks(text[position:]))
+    return blocks
+
+
+def _split_text_blocks(text: str) -> list[tuple[str, str]]:
+    blocks = []
+    paragraph = []
+    for line in text.split("\n"):
+        if line.startswith(HEADING_PREFIX):
+            if paragraph:
+                blocks.append(("text", "\n".join(paragraph).strip()))
+                paragraph = []
+            blocks.append(("heading", line.strip()))
+        else:
+            paragraph.append(line)
+    if paragraph and "\n".join(paragraph).strip():
+        blocks.append(("text", "\n".join(paragraph).strip()))
+    return [block for block in blocks if block[1]]
+
+
+class StructureAwareSplitter:
+    """
+    Splits documents on section and table boundaries first, packing whole sections and
+    tables into chunks of up to chunk_size, and only falls back to size-based splitting
+    inside a section (or table) that is too large on its own.
+
+    Overlap is adaptive: chunks that start at a natural boundary (heading or table) get
+    none, and only size-based continuations of a section repeat up to chunk_overlap of
+    the previous text (plus the section heading). Sizes are measured in characters or
+    estimated tokens.
+    """
+
+    def __init__(self, chunk_size: int = 2000, chunk_overlap: int = 300, chunk_unit: str = 'chars'):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.length = estimate_tokens if chunk_unit == 'tokens' else len
+
+    def _split_oversized(self, kind: str, content: str, budget: int) -> list[str]:
+        """Size-based split of a single block larger than a chunk. Table rows get no overlap."""
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max(budget, 1),
+            chunk_overlap=0 if kind == "table" else min(self.chunk_overlap, budget // 2),
+            length_function=self.length,
+            separators=["\n", " ", ""] if kind == "table" else None,
+        )
+        return splitter.split_text(content)
+
+    def _sections(self, text: str) -> list[list[tuple[str, str]]]:
+        """Groups blocks into sections, each starting at a heading (the first may have none)."""
+        sections = [[]]
+        for block in _split_blocks(text):
+            if block[0] == "heading" and sections[-1]:
+                sections.append([])
+            sections[-1].append(block)
+        return [section for section in sections if section]
+
+    def _split_section(self, section: list[tuple[str, str]]) -> list[str]:
+        """Splits a section that doesn't fit in one chunk, keeping tables whole where possible."""
+        pieces = []
+        heading = section[0][1] if section[0][0] == "heading" else ""
+        current = heading
+        for kind, content in section[1:] if heading else section:
+            candidate = f"{current}\n\n{content}" if current else content
+            if self.length(candidate) <= self.chunk_size:
+                current = candidate
+                continue
+            if current and current != heading:
+                pieces.append(current)
+            prefix = f"{heading}\n\n" if heading else ""
+            if self.length(prefix + content) <= self.chunk_size:
+                current = prefix + content
+                continue
+            # A single block larger than a chunk: size-based split inside it, repeating the heading
+            parts = [prefix + part for part in self._split_oversized(kind, content, self.chunk_size - self.length(prefix))]
+            pieces.extend(parts[:-1])
+            current = parts[-1] if parts else heading
+        if current and current != heading:
+            pieces.append(current)
+        return pieces
+
+    def split_text(self, text: str) -> list[str]:
+        chunks = []
+        current = ""
+        for section in self._sections(text):
+            section_text = "\n\n".join(content for _, content in section)
+            candidate = f"{current}\n\n{section_text}" if current else section_text
+            if self.length(candidate) <= self.chunk_size:
+                # Small neighbouring sections share a chunk
+                current = candidate
+                continue
+            if current:
+                chunks.append(current)
+            if self.length(section_text) <= self.chunk_size:
+                current = section_text
+            else:
+                pieces = self._split_section(section)
+                chunks.extend(pieces[:-1])
+                current = pieces[-1] if pieces else ""
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def split_documents(self, documents: list[Document]) -> list[Document]:
+        return [
+            Document(page_content=chunk, metadata=dict(document.metadata))
+            for document in documents
+            for chunk in self.split_text(document.page_content)
+        ]
+
+
+def get_text_splitter(vector_store_config: dict):
+    """Returns the splitter selected by 'vector_store.chunker' ('recursive' is the original behaviour)."""
+    settings = chunk_settings(vector_store_config)
+    if settings["chunker"] == "structure":
+        return StructureAwareSplitter(settings["chunk_size"], settings["chunk_overlap"], settings["chunk_unit"])
+    length_function = estimate_tokens if settings["chunk_unit"] == 'tokens' else len
+    return RecursiveCharacterTextSplitter(
+        chunk_size=settings["chunk_size"], chunk_overlap=settings["chunk_overlap"], length_function=length_function
+    )
@@ -0,0 +1,118 @@
+# src/vector_store/dedup.py
+
+import re
+import zlib
+
+import numpy as np
+
+from src.vector_store.embedding_scheduler import pack_batches
+
+# Mersenne prime for the universal hash family; (a * h + b) stays within int64 for 32-bit h
+_PRIME = (1 << 31) - 1
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def dedup_settings(vector_store_config: dict) -> dict:
+    """The near-duplicate elimination settings, with defaults filled in. Stored in the manifest."""
+    num_perm = int(vector_store_config.get('dedup_num_perm', 128))
+    bands = int(vector_store_config.get('dedup_bands', 32))
+    if num_perm % bands:
+        raise ValueError(f"vector_store.dedup_num_perm ({num_perm}) must be a multiple of dedup_bands ({bands})")
+    return {
+        "dedup": bool(vector_store_config.get('dedup', False)),
+        "dedup_threshold": float(vector_store_config.get('dedup_threshold', 0.9)),
+        "dedup_num_perm": num_perm,
+        "dedup_bands": bands,
+        "dedup_shingle_size": int(vector_store_config.get('dedup_shingle_size', 5)),
+    }
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, using a seeded universal hash family so they are stable across runs."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.int64)
+
+    def shingles(self, text: str) -> set[str]:
+        words = _WORD_PATTERN.findall(text.casefold())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) & _PRIME for shingle in self.shingles(text)), dtype=np.int64
+        )
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+
+def find_near_duplicates(texts: list[str], threshold: float = 0.9, num_perm: int = 128, bands: int = 32,
+                         shingle_size: int = 5) -> dict[int, int]:
+    """
+    Finds near-duplicate texts with MinHash and LSH banding.
+
+    Texts are visited in order; each one is compared only with earlier representatives that
+    share at least one band bucket, and joins the most similar one whose estimated Jaccard
+    similarity reaches the threshold. Otherwise it becomes a representative itself.
+
+    Returns:
+        {duplicate index: representative index}
+    """
+    hasher = MinHasher(num_perm, shingle_size)
+    rows = num_perm // bands
+    buckets = {}
+    signatures = []
+    duplicates = {}
+    for index, text in enumerate(texts):
+        signature = hasher.signature(text)
+        signatures.append(signature)
+        keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(bands)]
+
+        candidates = {candidate for key in keys for candidate in buckets.get(key, ())}
+        best, best_similarity = None, threshold
+        for candidate in sorted(candidates):
+            similarity = float(np.mean(signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None:
+            duplicates[index] = best
+            continue
+        # Only representatives go into the buckets
+        for key in keys:
+            buckets.setdefault(key, []).append(index)
+    return duplicates
+
+
+def deduplicate_documents(docs: list, chunk_ids: list[str], vector_store_config: dict) -> tuple[list, list[str]]:
+    """
+    Drops near-duplicate chunks before embedding. The representative (first occurrence) keeps
+    the locations of its duplicates in metadata['duplicate_sources'] as {'source', 'page'} dicts.
+
+    Returns:
+        (kept chunks, kept chunk IDs)
+    """
+    settings = dedup_settings(vector_store_config)
+    texts = [doc.page_content for doc in docs]
+    duplicates = find_near_duplicates(texts, settings["dedup_threshold"], settings["dedup_num_perm"],
+                                      settings["dedup_bands"], settings["dedup_shingle_size"])
+    if not duplicates:
+        print(f"Deduplication: no near-duplicates among {len(docs)} chunks.")
+        return docs, chunk_ids
+
+    for duplicate, representative in duplicates.items():
+        metadata = docs[duplicate].metadata
+        docs[representative].metadata.setdefault('duplicate_sources', []).append(
+            {'source': metadata['source'], 'page': metadata.get('page')}
+        )
+
+    kept = [i for i in range(len(docs)) if i not in duplicates]
+    batch_size = int(vector_store_config.get('embedding_batch_size', 100))
+    batch_tokens = int(vector_store_config.get('embedding_batch_tokens', 30000))
+    requests_before = len(pack_batches(texts, batch_size, batch_tokens))
+    requests_after = len(pack_batches([texts[i] for i in kept], batch_size, batch_tokens))
+    print(f"Deduplication: removed {len(duplicates)} of {len(docs)} chunks "
+          f"({len(duplicates)} fewer texts to embed, {requests_before - requests_after} fewer embedding requests).")
+    return [docs[i] for i in kept], [chunk_ids[i] for i in kept]
@@ -0,0 +1,254 @@
+# src/vector_store/disk_store.py
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from src.vector_store.ann_index import RerankingIndex, unwrap_index
+
+INDEX_FILENAME = "index.faiss"
+DOCSTORE_FILENAME = "docstore.sqlite"
+# Full-precision vectors kept next to a quantized index for exact re-ranking
+FULL_VECTORS_FILENAME = "vectors.f32"
+# Written by LangChain's FAISS.save_local; its presence marks a legacy pickle store
+LEGACY_DOCSTORE_FILENAME = "index.pkl"
+
+
+class SqliteDocstore(Docstore, AddableMixin):
+    """
+    Chunk texts and metadata kept in SQLite and read one row at a time,
+    so a search only deserializes the documents it actually returns.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._lock = threading.Lock()
+
+    def search(self, search: str) -> str | Document:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, metadata FROM documents WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts: dict[str, Document]) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "INSERT INTO documents (id, content, metadata) VALUES (?, ?, ?)",
+                [(doc_id, doc.page_content, json.dumps(doc.metadata, default=str)) for doc_id, doc in texts.items()]
+            )
+            self._connection.commit()
+
+    def delete(self, ids: list) -> None:
+        with self._lock:
+            self._connection.executemany("DELETE FROM documents WHERE id = ?", [(doc_id,) for doc_id in ids])
+            self._connection.commit()
+
+
+class SqlitePositionMap(Mapping):
+    """Read-only FAISS position -> docstore ID mapping that is looked up lazily from SQLite."""
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.Lock):
+        self._connection = connection
+        self._lock = lock
+
+    def __getitem__(self, position: int) -> str:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT doc_id FROM positions WHERE position = ?", (int(position),)
+            ).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __iter__(self):
+        with self._lock:
+            positions = [row[0] for row in self._connection.execute("SELECT position FROM positions ORDER BY position")]
+        return iter(positions)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+
+def is_disk_store(vector_store_path: str) -> bool:
+    return os.path.exists(os.path.join(vector_store_path, DOCSTORE_FILENAME))
+
+
+def _write_docstore(db_path: str, vector_store: FAISS):
+    """Writes every document of the store, plus the position -> ID table, to a fresh SQLite file."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute("CREATE TABLE documents (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)")
+        connection.execute("CREATE TABLE positions (position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)")
+        for position in sorted(vector_store.index_to_docstore_id):
+            doc_id = vector_store.index_to_docstore_id[position]
+            doc = vector_store.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for id {doc_id}, got {doc}")
+            connection.execute("INSERT INTO positions (position, doc_id) VALUES (?, ?)", (int(position), doc_id))
+            connection.execute(
+                "INSERT INTO documents (id, content, metadata) VALUES (?, ?, ?)",
+                (doc_id, doc.page_content, json.dumps(doc.metadata, default=str))
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _patch_docstore(db_path: str, source_path: str, vector_store: FAISS, removed_ids: list[str], added_ids: list[str]):
+    """
+    Writes a copy of an existing docstore with removed_ids deleted and added_ids inserted, so
+    only the changed documents are serialized. The small position -> ID table is rewritten,
+    since removing vectors renumbers the positions after them.
+    """
+    shutil.copyfile(source_path, db_path)
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executemany("DELETE FROM documents WHERE id = ?", [(doc_id,) for doc_id in removed_ids])
+        for doc_id in added_ids:
+            doc = vector_store.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for id {doc_id}, got {doc}")
+            connection.execute(
+                "INSERT OR REPLACE INTO documents (id, content, metadata) VALUES (?, ?, ?)",
+                (doc_id, doc.page_content, json.dumps(doc.metadata, default=str))
+            )
+        connection.execute("DELETE FROM positions")
+        connection.executemany(
+            "INSERT INTO positions (position, doc_id) VALUES (?, ?)",
+            [(int(position), doc_id) for position, doc_id in vector_store.index_to_docstore_id.items()]
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def save_disk_store(vector_store: FAISS, vector_store_path: str,
+                    removed_ids: list[str] | None = None, added_ids: list[str] | None = None):
+    """
+    Saves the store as a raw FAISS index file plus a SQLite docstore.
+    Both are written to temporary files and swapped in, so readers never see a partial store.
+    Given the IDs an incremental update removed and added, the existing docstore is patched
+    instead of rewritten.
+    """
+    os.makedirs(vector_store_path, exist_ok=True)
+    index_path = os.path.join(vector_store_path, INDEX_FILENAME)
+    db_path = os.path.join(vector_store_path, DOCSTORE_FILENAME)
+
+    vectors_path = os.path.join(vector_store_path, FULL_VECTORS_FILENAME)
+
+    faiss.write_index(unwrap_index(vector_store.index), index_path + ".tmp")
+    if removed_ids is not None and added_ids is not None and os.path.exists(db_path):
+        _patch_docstore(db_path + ".tmp", db_path, vector_store, removed_ids, added_ids)
+    else:
+        _write_docstore(db_path + ".tmp", vector_store)
+    if isinstance(vector_store.index, RerankingIndex):
+        np.ascontiguousarray(vector_store.index.full_vectors, dtype=np.float32).tofile(vectors_path + ".tmp")
+        os.replace(vectors_path + ".tmp", vectors_path)
+    elif os.path.exists(vectors_path):
+        os.remove(vectors_path)
+    os.replace(index_path + ".tmp", index_path)
+    os.replace(db_path + ".tmp", db_path)
+
+    legacy_path = os.path.join(vector_store_path, LEGACY_DOCSTORE_FILENAME)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+
+
+def _mmap_flag(index_path: str) -> int:
+    """
+    IO_FLAG_MMAP only maps IVF inverted lists; flat codes (IndexFlat, scalar quantizer, PQ and
+    the HNSW storage) need IO_FLAG_MMAP_IFC, which older FAISS builds don't have.
+    IVF files are recognised by their 'Iw..' fourcc.
+    """
+    with open(index_path, 'rb') as f:
+        is_ivf = f.read(2) == b'Iw'
+    if is_ivf or not hasattr(faiss, 'IO_FLAG_MMAP_IFC'):
+        return faiss.IO_FLAG_MMAP
+    return faiss.IO_FLAG_MMAP_IFC
+
+
+def _read_index(index_path: str, mmap: bool):
+    if mmap:
+        try:
+            return faiss.read_index(index_path, _mmap_flag(index_path) | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            # Not every index type (or FAISS build) supports memory-mapped loading
+            print(f"Memory-mapped index loading not supported ({e}); reading it into memory.")
+    return faiss.read_index(index_path)
+
+
+def load_disk_store(vector_store_path: str, embeddings, mmap: bool = True) -> FAISS:
+    """
+    Opens a store written by save_disk_store. With mmap=True the index is memory-mapped
+    and IDs and documents are fetched from SQLite on demand; with mmap=False everything
+    is loaded into a normal, writable in-memory store (used for incremental updates).
+    """
+    index = _read_index(os.path.join(vector_store_path, INDEX_FILENAME), mmap)
+    vectors_path = os.path.join(vector_store_path, FULL_VECTORS_FILENAME)
+    if os.path.exists(vectors_path):
+        full_vectors = np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(index.ntotal, index.d))
+        index = RerankingIndex(index, full_vectors)
+    connection = sqlite3.connect(os.path.join(vector_store_path, DOCSTORE_FILENAME), check_same_thread=False)
+
+    if mmap:
+        docstore = SqliteDocstore(connection)
+        index_to_docstore_id = SqlitePositionMap(connection, docstore._lock)
+    else:
+        # Materialize everything so the store can be modified and re-saved safely
+        try:
+            index_to_docstore_id = dict(connection.execute("SELECT position, doc_id FROM positions"))
+            docstore = InMemoryDocstore({
+                doc_id: Document(page_content=content, metadata=json.loads(metadata))
+                for doc_id, content, metadata in connection.execute("SELECT id, content, metadata FROM documents")
+            })
+        finally:
+            connection.close()
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+
+def save_vector_store(vector_store: FAISS, vector_store_path: str, config: dict,
+                      removed_ids: list[str] | None = None, added_ids: list[str] | None = None):
+    """
+    Saves in the format chosen by 'vector_store.storage_format' ('disk' by default, or 'pickle').
+    removed_ids and added_ids let the disk format patch its docstore after an incremental update.
+    """
+    storage_format = config.get('vector_store', {}).get('storage_format', 'disk')
+    if storage_format == 'pickle':
+        if isinstance(vector_store.index, RerankingIndex):
+            raise ValueError("vector_store.rerank requires storage_format 'disk'.")
+        vector_store.save_local(vector_store_path)
+    else:
+        save_disk_store(vector_store, vector_store_path, removed_ids, added_ids)
+
+
+def load_vector_store(vector_store_path: str, embeddings, mmap: bool = True) -> FAISS:
+    """Loads whichever format is on disk, preferring the disk (non-pickle) format."""
+    if is_disk_store(vector_store_path):
+        return load_disk_store(vector_store_path, embeddings, mmap=mmap)
+    return FAISS.load_local(
+        vector_store_path,
+        embeddings,
+        allow_dangerous_deserialization=True
+    )
@@ -0,0 +1,143 @@
+# src/vector_store/embedding_scheduler.py
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from langchain_core.embeddings import Embeddings
+
+# Rough characters-per-token ratio used to size batches without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Called with (text indices, vectors) whenever a batch completes
+BatchCallback = Callable[[list[int], list[list[float]]], None]
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def pack_batches(texts: list[str], max_batch_size: int, max_batch_tokens: int) -> list[list[int]]:
+    """
+    Greedily packs text indices into batches bounded by both count and estimated tokens.
+    A single text larger than the token budget still gets a batch of its own.
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class EmbeddingScheduler:
+    """
+    Embeds texts in packed batches, several batches at a time.
+
+    Each batch is retried with exponential backoff, so one transient failure doesn't abort
+    a long build, and every completed batch is handed to the on_batch_done callback straight
+    away so it can be checkpointed (e.g. written to the embedding cache).
+    """
+
+    def __init__(self, base: Embeddings, max_batch_size: int = 100, max_batch_tokens: int = 30000,
+                 concurrency: int = 4, max_retries: int = 5, backoff_seconds: float = 1.0):
+        self.base = base
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._lock = threading.Lock()
+
+    def _embed_batch(self, texts: list[str], latencies: list[float], retries: list[int]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                vectors = self.base.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.25)
+                print(f"  - Embedding batch of {len(texts)} failed ({e}); retrying in {delay:.1f}s...")
+                with self._lock:
+                    retries[0] += 1
+                time.sleep(delay)
+                continue
+            with self._lock:
+                latencies.append(time.perf_counter() - start)
+            return vectors
+
+    def embed(self, texts: list[str], on_batch_done: BatchCallback | None = None) -> list[list[float]]:
+        """Embeds all texts and returns their vectors in input order."""
+        if not texts:
+            return []
+
+        batches = pack_batches(texts, self.max_batch_size, self.max_batch_tokens)
+        vectors = [None] * len(texts)
+        latencies, retries = [], [0]
+        start = time.perf_counter()
+
+        def run(batch: list[int]):
+            batch_vectors = self._embed_batch([texts[index] for index in batch], latencies, retries)
+            for index, vector in zip(batch, batch_vectors):
+                vectors[index] = vector
+            if on_batch_done is not None:
+                with self._lock:
+                    on_batch_done(batch, batch_vectors)
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+            futures = [pool.submit(run, batch) for batch in batches]
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    # Fail fast: drop the queued batches, but let running ones finish (and
+                    # checkpoint) as the with-block exits, then surface the first failure
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise future.exception()
+
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        print(f"Embedded {len(texts)} chunks in {len(batches)} batches in {elapsed:.1f}s "
+              f"({len(texts) / elapsed if elapsed else 0.0:.1f} chunks/s, {retries[0]} retries); "
+              f"batch latency p50 {_percentile(latencies, 50):.2f}s, p95 {_percentile(latencies, 95):.2f}s, "
+              f"p99 {_percentile(latencies, 99):.2f}s, max {latencies[-1] if latencies else 0.0:.2f}s")
+        return vectors
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Embeddings wrapper that routes document embedding through an EmbeddingScheduler."""
+
+    def __init__(self, scheduler: EmbeddingScheduler):
+        self.scheduler = scheduler
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.scheduler.embed(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.scheduler.base.embed_query(text)
+
+
+def get_embedding_scheduler(base: Embeddings, vector_store_config: dict) -> EmbeddingScheduler:
+    """Builds the scheduler from the 'vector_store.embedding_*' settings."""
+    return EmbeddingScheduler(
+        base,
+        max_batch_size=int(vector_store_config.get('embedding_batch_size', 100)),
+        max_batch_tokens=int(vector_store_config.get('embedding_batch_tokens', 30000)),
+        concurrency=int(vector_store_config.get('embedding_concurrency', 4)),
+        max_retries=int(vector_store_config.get('embedding_max_retries', 5)),
+        backoff_seconds=float(vector_store_config.get('embedding_backoff_seconds', 1.0)),
+    )
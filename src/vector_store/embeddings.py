@@ -0,0 +1,245 @@
+# src/vector_store/embeddings.py
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so only one process may write a cache at a time
+    fcntl = None
+
+from src.vector_store.embedding_scheduler import EmbeddingScheduler, ScheduledEmbeddings, get_embedding_scheduler
+
+# Embedding model name that selects the offline, deterministic stub
+LOCAL_STUB_MODEL = "local-stub"
+LOCAL_STUB_DIMENSION = 768
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Normalization applied before hashing, so whitespace-only edits don't cause re-embedding."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{normalize_chunk_text(text)}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Append-only, content-addressed store of embedding vectors for one embedding model.
+
+    Vectors live in a raw float32 file that is read through a memory map, and a parallel
+    keys file holds one content hash per row. Vectors are always written before their keys,
+    so an interrupted write can only leave unreferenced trailing rows behind.
+
+    Appends hold an exclusive lock on a lock file in the cache directory and take the row
+    count from the keys file on disk, so several processes can share one cache.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.cache_dir = os.path.join(cache_dir, safe_name)
+        self.model_name = model_name
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._vectors_path = os.path.join(self.cache_dir, "vectors.f32")
+        self._keys_path = os.path.join(self.cache_dir, "keys.txt")
+        self._meta_path = os.path.join(self.cache_dir, "meta.json")
+        self._lock_path = os.path.join(self.cache_dir, "cache.lock")
+        self._lock = threading.Lock()
+        self._matrix = None
+
+        self.dimension = None
+        self._rows = {}
+        self._row_count = 0
+        self._keys_offset = 0
+        self._sync_from_disk()
+
+    def _sync_from_disk(self):
+        """Picks up the dimension and any keys appended since the last sync, e.g. by another process."""
+        if self.dimension is None and os.path.exists(self._meta_path):
+            with open(self._meta_path, 'r') as f:
+                self.dimension = json.load(f)['dimension']
+        if not os.path.exists(self._keys_path):
+            return
+        with open(self._keys_path, 'rb') as f:
+            f.seek(self._keys_offset)
+            appended = f.read()
+        # Only complete lines count; a torn last line is an interrupted write
+        complete = appended[:appended.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            self._rows.setdefault(line.decode('ascii').strip(), self._row_count)
+            self._row_count += 1
+        self._keys_offset += len(complete)
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self._lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _open_matrix(self):
+        if self._matrix is None or self._matrix.shape[0] < self._row_count:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode='r',
+                                     shape=(self._row_count, self.dimension))
+        return self._matrix
+
+    def get_many(self, keys: list[str]) -> list[list[float] | None]:
+        """Returns the cached vector for each key, or None where the key is missing."""
+        with self._lock:
+            if not self._rows:
+                return [None] * len(keys)
+            matrix = self._open_matrix()
+            return [matrix[self._rows[key]].tolist() if key in self._rows else None for key in keys]
+
+    def put_many(self, keys: list[str], vectors: list[list[float]]):
+        """Appends new vectors; keys that are already cached (by any process) are ignored."""
+        with self._lock, self._write_lock():
+            self._sync_from_disk()
+            new_items = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._rows and key not in new_items:
+                    new_items[key] = vector
+            if not new_items:
+                return
+
+            block = np.asarray(list(new_items.values()), dtype=np.float32)
+            if self.dimension is None:
+                self.dimension = int(block.shape[1])
+                with open(self._meta_path, 'w') as f:
+                    json.dump({'model': self.model_name, 'dimension': self.dimension}, f)
+
+            # Release the map, then trim any unreferenced rows (and torn key line) left by an interrupted write
+            self._matrix = None
+            with open(self._vectors_path, 'ab') as f:
+                f.truncate(self._row_count * self.dimension * 4)
+                f.write(block.tobytes())
+            with open(self._keys_path, 'ab') as f:
+                f.truncate(self._keys_offset)
+                f.write("".join(key + "\n" for key in new_items).encode('ascii'))
+            for key in new_items:
+                self._rows[key] = self._row_count
+                self._row_count += 1
+            self._keys_offset = os.path.getsize(self._keys_path)
+
+
+class LocalStubEmbeddings(Embeddings):
+    """
+    Deterministic offline embeddings for tests, with optional simulated latency and
+    transient failures to exercise batching and retries without a real server.
+    """
+
+    def __init__(self, size: int = LOCAL_STUB_DIMENSION, latency_seconds: float = 0.0, failure_rate: float = 0.0):
+        self.model = DeterministicFakeEmbedding(size=size)
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+
+    def _simulate_call(self):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("simulated transient embedding failure")
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self._simulate_call()
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        self._simulate_call()
+        return self.model.embed_query(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model so documents are only embedded once per (model, normalized text).
+    Cache misses go through the scheduler, which checkpoints every finished batch into the cache.
+    Queries are passed straight through, since they are rarely repeated verbatim.
+    """
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache, scheduler: EmbeddingScheduler | None = None):
+        self.base = base
+        self.cache = cache
+        self.scheduler = scheduler
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [embedding_cache_key(self.cache.model_name, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = {}
+        for index, (key, vector) in enumerate(zip(keys, vectors)):
+            if vector is None:
+                missing.setdefault(key, []).append(index)
+        self.hits += len(texts) - sum(len(indexes) for indexes in missing.values())
+        self.misses += len(missing)
+
+        if missing:
+            missing_keys = list(missing)
+            missing_texts = [texts[missing[key][0]] for key in missing_keys]
+            if self.scheduler is not None:
+                new_vectors = self.scheduler.embed(
+                    missing_texts,
+                    on_batch_done=lambda batch, batch_vectors: self.cache.put_many(
+                        [missing_keys[index] for index in batch], batch_vectors
+                    ),
+                )
+            else:
+                new_vectors = self.base.embed_documents(missing_texts)
+                self.cache.put_many(missing_keys, new_vectors)
+            for key, vector in zip(missing_keys, new_vectors):
+                for index in missing[key]:
+                    vectors[index] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.base.embed_query(text)
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        hit_ratio = (self.hits / total * 100) if total else 0.0
+        return (f"Embedding cache: {self.hits}/{total} chunks served from cache ({hit_ratio:.1f}% hit ratio), "
+                f"{self.hits} embedding calls saved, {self.misses} texts sent to the API")
+
+
+def get_embeddings(config: dict, project_root: str) -> Embeddings:
+    """
+    Returns the embeddings model from the 'gemini' settings. Document embedding always goes
+    through the batch scheduler, and through the on-disk cache when
+    'vector_store.embedding_cache_dir' is set. 'embedding_model: local-stub' gives a
+    deterministic offline model for tests.
+    """
+    gemini_config = config['gemini']
+    vector_store_config = config.get('vector_store', {})
+    model_name = gemini_config['embedding_model']
+    if model_name == LOCAL_STUB_MODEL:
+        base = LocalStubEmbeddings(
+            latency_seconds=float(gemini_config.get('stub_latency_seconds', 0.0)),
+            failure_rate=float(gemini_config.get('stub_failure_rate', 0.0)),
+        )
+    else:
+        base = GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=gemini_config['api_key'])
+
+    scheduler = get_embedding_scheduler(base, vector_store_config)
+    cache_dir = vector_store_config.get('embedding_cache_dir')
+    if cache_dir:
+        return CachedEmbeddings(base, EmbeddingCache(os.path.join(project_root, cache_dir), model_name), scheduler)
+    return ScheduledEmbeddings(scheduler)
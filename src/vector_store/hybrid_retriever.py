@@ -0,0 +1,104 @@
+# src/vector_store/hybrid_retriever.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Any
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.vector_store.lexical_index import load_lexical_index
+from src.vector_store.sharded_store import ShardedVectorStore
+
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+
+# Shared pool for vector searches that run under a timeout
+_VECTOR_SEARCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vector-search")
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], rrf_k: int = 60) -> list[str]:
+    """Fuses several ranked ID lists; each ID scores sum(1 / (rrf_k + rank)) over the lists it appears in."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever that combines BM25 lexical search with FAISS vector search via reciprocal rank fusion.
+
+    In 'hybrid' mode, if the vector search (which needs an embedding API call) doesn't finish
+    within vector_timeout seconds, the lexical results are returned on their own.
+    'lexical' mode skips the embedding call entirely.
+    """
+
+    vector_store: Any
+    lexical_index: Any
+    k: int = 7
+    mode: str = "hybrid"
+    fetch_k: int = 20
+    rrf_k: int = 60
+    vector_timeout: float | None = None
+
+    def _vector_ids(self, query: str) -> list[str]:
+        embedding = self.vector_store.embedding_function.embed_query(query)
+        if isinstance(self.vector_store, ShardedVectorStore):
+            return self.vector_store.search_ids(embedding, self.fetch_k)
+        vector = np.asarray([embedding], dtype=np.float32)
+        _, positions = self.vector_store.index.search(vector, self.fetch_k)
+        return [self.vector_store.index_to_docstore_id[int(position)] for position in positions[0] if position >= 0]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        rankings = [[doc_id for doc_id, _ in self.lexical_index.search(query, self.fetch_k)]]
+        if self.mode == "hybrid":
+            future = _VECTOR_SEARCH_POOL.submit(self._vector_ids, query)
+            try:
+                rankings.append(future.result(timeout=self.vector_timeout))
+            except TimeoutError:
+                print(f"Vector search exceeded {self.vector_timeout}s; answering from the lexical index only.")
+            except Exception as e:
+                print(f"Vector search failed ({e}); answering from the lexical index only.")
+
+        documents = []
+        for doc_id in reciprocal_rank_fusion(rankings, self.rrf_k)[:self.k]:
+            doc = self.vector_store.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                documents.append(doc)
+        return documents
+
+
+def get_retriever(vector_store, config: dict, k: int = 7, vector_store_path: str | None = None):
+    """
+    Returns the retriever selected by 'vector_store.retrieval_mode': the plain vector retriever
+    ('vector', the default) or a HybridRetriever ('hybrid' or 'lexical').
+    vector_store_path is the directory the store was loaded from (defaults to 'data.vector_store_path').
+    """
+    vector_store_config = config.get('vector_store', {})
+    mode = vector_store_config.get('retrieval_mode', 'vector')
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown vector_store.retrieval_mode '{mode}', expected one of {RETRIEVAL_MODES}")
+    if mode == 'vector':
+        return vector_store.as_retriever(search_kwargs={"k": k})
+
+    if vector_store_path is None:
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        vector_store_path = os.path.join(project_root, config['data']['vector_store_path'])
+    lexical_index = load_lexical_index(vector_store_path)
+    if lexical_index is None:
+        print("Lexical index not found; falling back to vector retrieval.")
+        return vector_store.as_retriever(search_kwargs={"k": k})
+
+    timeout = vector_store_config.get('vector_timeout_seconds')
+    return HybridRetriever(
+        vector_store=vector_store,
+        lexical_index=lexical_index,
+        k=k,
+        mode=mode,
+        fetch_k=int(vector_store_config.get('hybrid_fetch_k', 20)),
+        rrf_k=int(vector_store_config.get('rrf_k', 60)),
+        vector_timeout=float(timeout) if timeout else None,
+    )
@@ -0,0 +1,157 @@
+# src/vector_store/lexical_index.py
+
+import math
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from collections import Counter
+
+LEXICAL_INDEX_FILENAME = "lexical.sqlite"
+
+# Keeps codes like "E-1023", "PNR/123" or "v2.1" together as single tokens
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_/.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases and splits text into terms, also indexing the parts of compound codes."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[-_/.]", token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+def _index_documents(connection: sqlite3.Connection, documents, first_position: int = 0) -> int:
+    """Inserts the docs rows and postings of (doc_id, text) pairs; returns how many were indexed."""
+    doc_count = 0
+    for position, (doc_id, text) in enumerate(documents, start=first_position):
+        counts = Counter(tokenize(text))
+        connection.execute("INSERT INTO docs VALUES (?, ?, ?)", (position, doc_id, sum(counts.values())))
+        connection.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                               [(term, position, tf) for term, tf in counts.items()])
+        doc_count += 1
+    return doc_count
+
+
+def _write_meta(connection: sqlite3.Connection) -> int:
+    """Recomputes the corpus statistics BM25 needs from the docs table; returns the doc count."""
+    doc_count, avg_length = connection.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+    connection.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+        ("doc_count", doc_count),
+        ("avg_length", avg_length or 0.0),
+    ])
+    return doc_count
+
+
+def build_lexical_index(documents, db_path: str):
+    """
+    Writes a BM25 inverted index over (doc_id, text) pairs to a fresh SQLite file.
+    The file is built under a temporary name and swapped in atomically.
+    """
+    temp_path = db_path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.execute("CREATE TABLE docs (position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, length INTEGER NOT NULL)")
+        connection.execute("CREATE TABLE postings (term TEXT NOT NULL, position INTEGER NOT NULL, tf INTEGER NOT NULL)")
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+        _index_documents(connection, documents)
+        connection.execute("CREATE INDEX postings_term ON postings (term)")
+        connection.execute("CREATE INDEX docs_doc_id ON docs (doc_id)")
+        doc_count = _write_meta(connection)
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, db_path)
+    print(f"Lexical index built over {doc_count} chunks.")
+
+
+def update_lexical_index(db_path: str, removed_ids: list[str], documents):
+    """
+    Patches an existing index instead of rebuilding it: drops the postings of removed_ids and
+    indexes the new (doc_id, text) pairs, so only the changed chunks are tokenized. Like
+    build_lexical_index, the patch is applied to a copy that is swapped in atomically, so open
+    readers keep a consistent view.
+    """
+    temp_path = db_path + ".tmp"
+    shutil.copyfile(db_path, temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        # Indexes built before incremental updates existed have no doc_id index yet
+        connection.execute("CREATE INDEX IF NOT EXISTS docs_doc_id ON docs (doc_id)")
+        connection.execute("CREATE TEMP TABLE stale (position INTEGER PRIMARY KEY)")
+        connection.executemany(
+            "INSERT OR IGNORE INTO stale SELECT position FROM docs WHERE doc_id = ?",
+            [(doc_id,) for doc_id in removed_ids]
+        )
+        removed = connection.execute("SELECT COUNT(*) FROM stale").fetchone()[0]
+        if removed:
+            # One pass over the postings, rather than one lookup per removed chunk
+            connection.execute("DELETE FROM postings WHERE position IN (SELECT position FROM stale)")
+            connection.execute("DELETE FROM docs WHERE position IN (SELECT position FROM stale)")
+        next_position = connection.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM docs").fetchone()[0]
+        added = _index_documents(connection, documents, next_position)
+        doc_count = _write_meta(connection)
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, db_path)
+    print(f"Lexical index updated: {removed} chunks removed, {added} added ({doc_count} in total).")
+
+
+class LexicalIndex:
+    """
+    Read side of the BM25 index. Only the posting lists of the query terms are read,
+    so query cost depends on the query, not on the size of the corpus.
+    """
+
+    def __init__(self, db_path: str, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        meta = dict(self._connection.execute("SELECT key, value FROM meta"))
+        self.doc_count = int(meta.get("doc_count", 0))
+        self.avg_length = meta.get("avg_length", 0.0) or 1.0
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        """Returns up to k (doc_id, bm25 score) pairs, best first."""
+        terms = set(tokenize(query))
+        if not terms or not self.doc_count:
+            return []
+
+        scores = Counter()
+        with self._lock:
+            for term in terms:
+                rows = self._connection.execute(
+                    "SELECT p.position, p.tf, d.length FROM postings p JOIN docs d ON d.position = p.position "
+                    "WHERE p.term = ?", (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (self.doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+                for position, tf, length in rows:
+                    norm = self.k1 * (1 - self.b + self.b * length / self.avg_length)
+                    scores[position] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = scores.most_common(k)
+            doc_ids = {
+                position: doc_id for position, doc_id in self._connection.execute(
+                    f"SELECT position, doc_id FROM docs WHERE position IN ({','.join('?' * len(top))})",
+                    [position for position, _ in top]
+                )
+            } if top else {}
+        return [(doc_ids[position], score) for position, score in top]
+
+    def close(self):
+        self._connection.close()
+
+
+def load_lexical_index(vector_store_path: str) -> LexicalIndex | None:
+    db_path = os.path.join(vector_store_path, LEXICAL_INDEX_FILENAME)
+    return LexicalIndex(db_path) if os.path.exists(db_path) else None
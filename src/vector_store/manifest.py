@@ -0,0 +1,104 @@
+# src/vector_store/manifest.py
+
+import json
+import os
+
+from src.utils.hashing import hash_file
+
+MANIFEST_FILENAME = "manifest.json"
+# Bump whenever the chunk layout changes so existing stores are rebuilt
+MANIFEST_VERSION = 2
+
+
+def file_signature(path: str) -> list[int]:
+    """[mtime_ns, size] of a file, the cheap check for whether its content may have changed."""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def hash_sources(pdf_folder_path: str, files: list[str],
+                 manifest: dict | None = None) -> tuple[dict[str, str], dict[str, list[int]]]:
+    """
+    Maps each source file name to its content hash, and to the signature it had when hashed.
+    A file whose signature matches the one recorded in the manifest keeps its recorded hash
+    without being read, so a start with unchanged sources only stats the files.
+    """
+    recorded = manifest.get("files", {}) if manifest is not None else {}
+    hashes, signatures = {}, {}
+    for file in files:
+        path = os.path.join(pdf_folder_path, file)
+        # Taken before hashing: a write during hashing then shows up as a changed signature next time
+        signatures[file] = file_signature(path)
+        entry = recorded.get(file)
+        if entry is not None and entry.get("signature") == signatures[file]:
+            hashes[file] = entry["sha256"]
+        else:
+            hashes[file] = hash_file(path)
+    return hashes, signatures
+
+
+def record_signatures(vector_store_path: str, source_hashes: dict[str, str], signatures: dict[str, list[int]]):
+    """
+    Stores the signature each recorded hash was taken at in the manifest, for hash_sources
+    to trust next time. Only entries whose recorded hash is the current one are updated.
+    """
+    manifest = load_manifest(vector_store_path)
+    if manifest is None:
+        return
+    updated = False
+    for file, entry in manifest["files"].items():
+        signature = signatures.get(file)
+        if signature is not None and entry["sha256"] == source_hashes.get(file) and entry.get("signature") != signature:
+            entry["signature"] = signature
+            updated = True
+    if updated:
+        save_manifest(vector_store_path, manifest)
+
+
+def make_chunk_id(file: str, file_hash: str, index: int) -> str:
+    """Deterministic chunk ID, so the same file content always produces the same IDs."""
+    return f"{file}::{file_hash[:12]}::{index}"
+
+
+def new_manifest(embedding_model: str, index: dict | None = None) -> dict:
+    """Returns an empty manifest for a knowledge base built with the given embedding model and index settings."""
+    return {"version": MANIFEST_VERSION, "embedding_model": embedding_model, "index": index or {}, "files": {}}
+
+
+def load_manifest(vector_store_path: str) -> dict | None:
+    """Reads the build manifest stored next to the index, or None if there isn't one."""
+    manifest_path = os.path.join(vector_store_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(vector_store_path: str, manifest: dict):
+    """Writes the manifest atomically so a crash never leaves a half-written file."""
+    os.makedirs(vector_store_path, exist_ok=True)
+    manifest_path = os.path.join(vector_store_path, MANIFEST_FILENAME)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def diff_sources(manifest: dict, current_hashes: dict[str, str]) -> tuple[list[str], list[str], list[str]]:
+    """
+    Compares the manifest with the current source hashes.
+
+    Returns:
+        (added, changed, removed) file name lists, each sorted.
+    """
+    recorded = manifest.get("files", {})
+    added = sorted(file for file in current_hashes if file not in recorded)
+    changed = sorted(
+        file for file, file_hash in current_hashes.items()
+        if file in recorded and recorded[file]["sha256"] != file_hash
+    )
+    removed = sorted(file for file in recorded if file not in current_hashes)
+    return added, changed, removed
@@ -0,0 +1,189 @@
+# src/vector_store/sharded_store.py
+
+import hashlib
+import heapq
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.vector_store.ann_index import apply_search_params, build_faiss_store
+from src.vector_store.disk_store import load_vector_store, save_vector_store
+
+SHARDS_DIRNAME = "shards"
+
+
+def shard_name(file: str) -> str:
+    """Filesystem-safe, stable shard directory name for a source file."""
+    return hashlib.sha256(file.encode('utf-8')).hexdigest()[:16]
+
+
+def shard_path(vector_store_path: str, name: str) -> str:
+    return os.path.join(vector_store_path, SHARDS_DIRNAME, name)
+
+
+class ShardedDocstore(Docstore):
+    """Looks documents up in the shard that owns them, using the source file encoded in the chunk ID."""
+
+    def __init__(self, sharded_store: "ShardedVectorStore"):
+        self._sharded_store = sharded_store
+
+    def search(self, search: str) -> str | Document:
+        shard = self._sharded_store.shards.get(shard_name(search.split("::", 1)[0]))
+        if shard is None:
+            return f"ID {search} not found."
+        return shard.docstore.search(search)
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    A set of independent FAISS stores (one per source document) searched as one.
+
+    A query is embedded once, fanned out to every shard on a thread pool, and the
+    per-shard top-k lists are merged with a heap. Shards can be added and removed
+    without touching the others. add_texts routes each text to the shard of its
+    'source' metadata, creating the shard (with the 'vector_store' index settings
+    in config) if it doesn't exist yet.
+
+    close() shuts the thread pool down; searches still running against a closed
+    store (e.g. a request that began before a snapshot swap) fall back to
+    searching the shards one after another.
+    """
+
+    def __init__(self, embedding: Embeddings, shards: dict[str, Any] | None = None, max_workers: int = 8,
+                 config: dict | None = None):
+        self.embedding = embedding
+        self.shards = dict(shards or {})
+        self.docstore = ShardedDocstore(self)
+        self.config = config or {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="shard-search")
+        self._closed = False
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def embedding_function(self) -> Embeddings:
+        return self.embedding
+
+    def add_shard(self, name: str, store):
+        # Replace the dict instead of mutating it, so concurrent searches see a consistent set
+        self.shards = {**self.shards, name: store}
+
+    def remove_shard(self, name: str):
+        self.shards = {key: value for key, value in self.shards.items() if key != name}
+
+    def _map_shards(self, fn, shards: list) -> list:
+        """fn(shard) for every shard, on the pool unless the store has been closed."""
+        if not self._closed:
+            try:
+                futures = [self._pool.submit(fn, shard) for shard in shards]
+            except RuntimeError:
+                # Closed between the check and the submit
+                pass
+            else:
+                return [future.result() for future in futures]
+        return [fn(shard) for shard in shards]
+
+    def similarity_search_with_score_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[tuple[Document, float]]:
+        shard_hits = self._map_shards(
+            lambda shard: shard.similarity_search_with_score_by_vector(embedding, k, **kwargs),
+            list(self.shards.values()),
+        )
+        results = (hit for hits in shard_hits for hit in hits)
+        # FAISS returns L2 distances, so the best hits are the smallest scores
+        return heapq.nsmallest(k, results, key=lambda hit: hit[1])
+
+    def search_ids(self, embedding: list[float], k: int) -> list[str]:
+        """Returns the chunk IDs of the k nearest chunks across all shards, best first."""
+        vector = np.asarray([embedding], dtype=np.float32)
+
+        def search_shard(shard):
+            distances, positions = shard.index.search(vector, k)
+            return [
+                (float(distance), shard.index_to_docstore_id[int(position)])
+                for distance, position in zip(distances[0], positions[0]) if position >= 0
+            ]
+
+        shard_hits = self._map_shards(search_shard, list(self.shards.values()))
+        hits = heapq.nsmallest(k, (hit for hits in shard_hits for hit in hits))
+        return [doc_id for _, doc_id in hits]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def add_texts(self, texts: Iterable[str], metadatas: list[dict] | None = None, **kwargs: Any) -> list[str]:
+        """
+        Adds texts to the shards of their 'source' metadata. IDs default to "<source>::<uuid>",
+        and given IDs must keep the "<source>::" prefix so the docstore can find their shard.
+        Adding to an existing shard needs a store loaded with mmap=False.
+        """
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = kwargs.pop("ids", None)
+        if ids is None:
+            ids = [f"{metadata.get('source', '')}::{uuid.uuid4().hex}" for metadata in metadatas]
+
+        by_shard = {}
+        for text, metadata, doc_id in zip(texts, metadatas, ids):
+            source = metadata.get('source', '')
+            if doc_id.split("::", 1)[0] != source:
+                raise ValueError(f"Chunk ID {doc_id} doesn't start with its source file '{source}::'.")
+            by_shard.setdefault(shard_name(source), []).append((Document(page_content=text, metadata=metadata), doc_id))
+
+        for name, items in by_shard.items():
+            docs = [doc for doc, _ in items]
+            doc_ids = [doc_id for _, doc_id in items]
+            shard = self.shards.get(name)
+            if shard is None:
+                self.add_shard(name, build_faiss_store(docs, doc_ids, self.embedding, self.config))
+            else:
+                shard.add_documents(docs, ids=doc_ids)
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts: list[str], embedding: Embeddings, metadatas: list[dict] | None = None, **kwargs: Any):
+        """Builds a store with one shard per 'source' in the metadata."""
+        ids = kwargs.pop("ids", None)
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def close(self):
+        self._closed = True
+        self._pool.shutdown(wait=False)
+
+
+def save_shard(store, vector_store_path: str, name: str, config: dict):
+    save_vector_store(store, shard_path(vector_store_path, name), config)
+
+
+def delete_shard(vector_store_path: str, name: str):
+    shutil.rmtree(shard_path(vector_store_path, name), ignore_errors=True)
+
+
+def load_sharded_store(vector_store_path: str, embeddings: Embeddings, names: list[str], config: dict,
+                       mmap: bool = True) -> ShardedVectorStore:
+    """Opens the named shards (memory-mapped by default) as one ShardedVectorStore."""
+    vector_store_config = config.get('vector_store', {})
+    sharded = ShardedVectorStore(embeddings, max_workers=int(vector_store_config.get('shard_search_workers', 8)),
+                                 config=config)
+    for name in names:
+        store = load_vector_store(shard_path(vector_store_path, name), embeddings, mmap=mmap)
+        apply_search_params(store.index, vector_store_config)
+        sharded.add_shard(name, store)
+    return sharded
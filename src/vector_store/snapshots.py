@@ -0,0 +1,112 @@
+# src/vector_store/snapshots.py
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Callable
+
+SNAPSHOTS_DIRNAME = "snapshots"
+CURRENT_FILENAME = "CURRENT"
+
+
+def snapshot_path(root: str, version: str) -> str:
+    return os.path.join(root, SNAPSHOTS_DIRNAME, version)
+
+
+def current_snapshot(root: str) -> str | None:
+    """Returns the published snapshot version, or None if nothing has been published yet."""
+    try:
+        with open(os.path.join(root, CURRENT_FILENAME), 'r') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version if version and os.path.isdir(snapshot_path(root, version)) else None
+
+
+def new_snapshot_version() -> str:
+    """Versions sort chronologically; the random suffix keeps concurrent builds apart."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def stage_snapshot(root: str, base_version: str | None) -> tuple[str, str]:
+    """
+    Creates the directory for a new snapshot, seeded with a copy of base_version (if any)
+    so incremental updates never touch a published snapshot. Returns (version, path).
+    """
+    version = new_snapshot_version()
+    path = snapshot_path(root, version)
+    if base_version is not None:
+        shutil.copytree(snapshot_path(root, base_version), path)
+    else:
+        os.makedirs(path)
+    return version, path
+
+
+def publish_snapshot(root: str, version: str):
+    """Atomically points CURRENT at the given snapshot."""
+    current_path = os.path.join(root, CURRENT_FILENAME)
+    temp_path = f"{current_path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, current_path)
+    print(f"Published knowledge base snapshot {version}.")
+
+
+def discard_snapshot(root: str, version: str):
+    shutil.rmtree(snapshot_path(root, version), ignore_errors=True)
+
+
+def collect_garbage(root: str, retention: int):
+    """Deletes all but the newest 'retention' snapshots; the current one is always kept."""
+    snapshots_dir = os.path.join(root, SNAPSHOTS_DIRNAME)
+    if not os.path.isdir(snapshots_dir):
+        return
+    current = current_snapshot(root)
+    versions = sorted(os.listdir(snapshots_dir), reverse=True)
+    for version in versions[max(1, retention):]:
+        if version != current:
+            print(f"Removing old knowledge base snapshot {version}.")
+            discard_snapshot(root, version)
+
+
+class SnapshotWatcher:
+    """
+    Background thread that polls CURRENT and calls on_new_snapshot(version, path) whenever
+    a different snapshot is published. Errors in the callback are logged and retried on the
+    next change, so a bad snapshot never takes the running app down.
+    """
+
+    def __init__(self, root: str, loaded_version: str | None, on_new_snapshot: Callable[[str, str], None],
+                 poll_seconds: float = 30.0):
+        self.root = root
+        self.loaded_version = loaded_version
+        self.on_new_snapshot = on_new_snapshot
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        failed_version = None
+        while not self._stop.wait(self.poll_seconds):
+            version = current_snapshot(self.root)
+            if version is None or version in (self.loaded_version, failed_version):
+                continue
+            print(f"New knowledge base snapshot {version} detected. Loading in the background...")
+            try:
+                self.on_new_snapshot(version, snapshot_path(self.root, version))
+            except Exception as e:
+                print(f"Failed to load snapshot {version}; keeping {self.loaded_version}: {e}")
+                failed_version = version
+                continue
+            self.loaded_version = version
@@ -2,63 +2,410 @@
 
 import sys
 import os
+import shutil
 import yaml
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
 
 # --- System Path Setup ---
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.append(PROJECT_ROOT)
 
 # --- Now import from your src module ---
-from src.ingestion.pdf_loader import load_and_process_pdfs
+from src.ingestion.pdf_loader import iter_pdf_documents, list_pdf_files
+from src.vector_store.ann_index import apply_search_params, build_faiss_store, index_settings, supports_incremental_updates
+from src.vector_store.chunker import chunk_settings, get_text_splitter
+from src.vector_store.dedup import dedup_settings, deduplicate_documents
+from src.vector_store.disk_store import load_vector_store, save_vector_store
+from src.vector_store.embeddings import CachedEmbeddings, get_embeddings
+from src.vector_store.lexical_index import LEXICAL_INDEX_FILENAME, build_lexical_index, update_lexical_index
+from src.vector_store.sharded_store import (
+    SHARDS_DIRNAME, ShardedVectorStore, delete_shard, load_sharded_store, save_shard, shard_name
+)
+from src.vector_store.manifest import (
+    MANIFEST_FILENAME, diff_sources, hash_sources, load_manifest, make_chunk_id, new_manifest, record_signatures,
+    save_manifest
+)
+from src.vector_store.snapshots import (
+    collect_garbage, current_snapshot, discard_snapshot, publish_snapshot, snapshot_path, stage_snapshot
+)
 
-def get_or_create_vector_store(config: dict):
+def _build_settings(vector_store_config: dict) -> dict:
+    """Index and chunking settings of a build; a store built with different ones is rebuilt."""
+    return {**index_settings(vector_store_config), **chunk_settings(vector_store_config),
+            **dedup_settings(vector_store_config)}
+
+
+def _split_and_label(documents, source_hashes: dict[str, str], config: dict) -> tuple[list, list[str], dict[str, list[str]]]:
     """
-    Checks if the vector store exists. If so, loads it.
-    If not, builds it, saves it, and returns the store object directly from memory.
-    This function is now completely decoupled from Streamlit.
+    Splits a stream of page documents into chunks, one page at a time, and gives every chunk
+    a deterministic ID derived from its source file. With 'vector_store.dedup' enabled,
+    near-duplicate chunks are dropped here, before anything is embedded.
+
+    Returns:
+        (chunks, chunk_ids, chunk_ids_by_file)
+    """
+    vector_store_config = config.get('vector_store', {})
+    text_splitter = get_text_splitter(vector_store_config)
+    docs = []
+    for document in documents:
+        docs.extend(text_splitter.split_documents([document]))
+
+    chunk_ids = []
+    position_by_file = {}
+    for doc in docs:
+        file = doc.metadata['source']
+        position = position_by_file.get(file, 0)
+        position_by_file[file] = position + 1
+        chunk_ids.append(make_chunk_id(file, source_hashes[file], position))
+
+    if dedup_settings(vector_store_config)["dedup"] and docs:
+        docs, chunk_ids = deduplicate_documents(docs, chunk_ids, vector_store_config)
+
+    chunk_ids_by_file = {}
+    for doc, chunk_id in zip(docs, chunk_ids):
+        chunk_ids_by_file.setdefault(doc.metadata['source'], []).append(chunk_id)
+    return docs, chunk_ids, chunk_ids_by_file
+
+
+def _record_sources(manifest: dict, files: list[str], source_hashes: dict[str, str],
+                    chunk_ids_by_file: dict[str, list[str]], docs: list):
+    """
+    Stores the hash and chunk IDs of each (re)built file in the manifest, and the files whose
+    chunks stand in for its deduplicated ones ('duplicate_of').
+    """
+    duplicate_of = {}
+    for doc in docs:
+        for duplicate in doc.metadata.get('duplicate_sources', []):
+            if duplicate['source'] != doc.metadata['source']:
+                duplicate_of.setdefault(duplicate['source'], set()).add(doc.metadata['source'])
+    for file in files:
+        manifest["files"][file] = {
+            "sha256": source_hashes[file],
+            "chunk_ids": chunk_ids_by_file.get(file, []),
+            "duplicate_of": sorted(duplicate_of.get(file, ())),
+        }
+
+
+def _with_dependents(manifest: dict, changed: list[str], removed: list[str]) -> list[str]:
+    """
+    Extends the changed files with unchanged ones whose deduplicated chunks are represented by a
+    changed or removed file (transitively), since those chunks have to be re-created.
+    """
+    affected = set(changed) | set(removed)
+    while True:
+        dependents = {
+            file for file, entry in manifest["files"].items()
+            if file not in affected and affected.intersection(entry.get("duplicate_of", ()))
+        }
+        if not dependents:
+            return sorted(affected - set(removed))
+        affected |= dependents
+
+
+def _report_embedding_cache(embeddings):
+    if isinstance(embeddings, CachedEmbeddings):
+        print(embeddings.report())
+
+
+def _iter_store_chunks(vector_store):
+    """Yields (chunk_id, text) for every chunk of a store (or of every shard), in index order."""
+    if isinstance(vector_store, ShardedVectorStore):
+        stores = [vector_store.shards[name] for name in sorted(vector_store.shards)]
+    else:
+        stores = [vector_store]
+    for store in stores:
+        for _, doc_id in sorted(store.index_to_docstore_id.items()):
+            yield doc_id, store.docstore.search(doc_id).page_content
+
+
+def _build_lexical_index(vector_store, vector_store_path: str):
+    """Builds the BM25 lexical index over the same chunks as the vector store."""
+    build_lexical_index(_iter_store_chunks(vector_store), os.path.join(vector_store_path, LEXICAL_INDEX_FILENAME))
+
+
+def _update_lexical_index(vector_store, vector_store_path: str, removed_ids: list[str], docs: list, chunk_ids: list[str]):
+    """Patches the lexical index for an incremental update, or builds it if there is none yet."""
+    db_path = os.path.join(vector_store_path, LEXICAL_INDEX_FILENAME)
+    if not os.path.exists(db_path):
+        _build_lexical_index(vector_store, vector_store_path)
+        return
+    update_lexical_index(db_path, removed_ids, ((chunk_id, doc.page_content) for chunk_id, doc in zip(chunk_ids, docs)))
+
+
+def _save_knowledge_base(vector_store, vector_store_path: str, config: dict):
+    """Saves the vector store together with its lexical index."""
+    save_vector_store(vector_store, vector_store_path, config)
+    _build_lexical_index(vector_store, vector_store_path)
+
+
+def _build_vector_store(config: dict, vector_store_path: str, pdf_path: str, source_hashes: dict[str, str], embeddings):
+    """Builds the whole knowledge base from scratch and writes the index together with its manifest."""
+    files = sorted(source_hashes)
+    documents = iter_pdf_documents(pdf_path, config, files, source_hashes)
+    docs, chunk_ids, chunk_ids_by_file = _split_and_label(documents, source_hashes, config)
+    if not docs:
+        # Error messages are now simple prints; app.py will show the st.error()
+        print("ERROR: No documents were loaded to build the knowledge base.")
+        return None
+
+    print("Building and saving FAISS vector store...")
+    vector_store = build_faiss_store(docs, chunk_ids, embeddings, config)
+    _save_knowledge_base(vector_store, vector_store_path, config)
+
+    manifest = new_manifest(config['gemini']['embedding_model'], _build_settings(config.get('vector_store', {})))
+    _record_sources(manifest, files, source_hashes, chunk_ids_by_file, docs)
+    save_manifest(vector_store_path, manifest)
+    _report_embedding_cache(embeddings)
+    print(f"Knowledge base built and saved successfully at {vector_store_path}")
+    # Return the newly created object directly from memory
+    return vector_store
+
+
+def _update_vector_store(vector_store, manifest: dict, config: dict, vector_store_path: str, pdf_path: str,
+                         source_hashes: dict[str, str], added: list[str], changed: list[str], removed: list[str],
+                         embeddings):
+    """
+    Applies a source diff to an existing store: drops the chunks of changed and removed files,
+    then partitions and embeds only the added and changed files.
+    """
+    stale_ids = [
+        chunk_id
+        for file in changed + removed
+        for chunk_id in manifest["files"][file]["chunk_ids"]
+    ]
+    if stale_ids:
+        print(f"Removing {len(stale_ids)} stale chunks...")
+        vector_store.delete(stale_ids)
+    for file in removed:
+        del manifest["files"][file]
+
+    to_load = sorted(added + changed)
+    docs, chunk_ids = [], []
+    if to_load:
+        documents = iter_pdf_documents(pdf_path, config, to_load, source_hashes)
+        docs, chunk_ids, chunk_ids_by_file = _split_and_label(documents, source_hashes, config)
+        if docs:
+            print(f"Embedding {len(docs)} new chunks...")
+            vector_store.add_documents(docs, ids=chunk_ids)
+        _record_sources(manifest, to_load, source_hashes, chunk_ids_by_file, docs)
+
+    # Only the removed and added chunks are written; the rest of the docstore and lexical index is kept
+    save_vector_store(vector_store, vector_store_path, config, removed_ids=stale_ids, added_ids=chunk_ids)
+    _update_lexical_index(vector_store, vector_store_path, stale_ids, docs, chunk_ids)
+    save_manifest(vector_store_path, manifest)
+    _report_embedding_cache(embeddings)
+    print("Knowledge base updated successfully.")
+    return vector_store
+
+
+def _build_shards(sharded_store: ShardedVectorStore, config: dict, vector_store_path: str, pdf_path: str,
+                  source_hashes: dict[str, str], files: list[str], embeddings) -> tuple[list, list[str], dict[str, list[str]]]:
+    """Builds, saves and registers one shard per source file; returns the chunks, their IDs and the chunk IDs per file."""
+    documents = iter_pdf_documents(pdf_path, config, files, source_hashes)
+    docs, chunk_ids, chunk_ids_by_file = _split_and_label(documents, source_hashes, config)
+
+    docs_by_file = {}
+    for doc, chunk_id in zip(docs, chunk_ids):
+        file_docs, file_ids = docs_by_file.setdefault(doc.metadata['source'], ([], []))
+        file_docs.append(doc)
+        file_ids.append(chunk_id)
+
+    for file, (file_docs, file_ids) in docs_by_file.items():
+        print(f"Building shard for {file} ({len(file_docs)} chunks)...")
+        store = build_faiss_store(file_docs, file_ids, embeddings, config)
+        name = shard_name(file)
+        save_shard(store, vector_store_path, name, config)
+        sharded_store.add_shard(name, store)
+    return docs, chunk_ids, chunk_ids_by_file
+
+
+def _get_or_create_sharded_store(config: dict, vector_store_path: str, pdf_path: str, source_hashes: dict[str, str],
+                                 manifest: dict | None, usable: bool, embeddings):
     """
-    vector_store_path = os.path.join(PROJECT_ROOT, config['data']['vector_store_path'])
-    api_key = config['gemini']['api_key']
+    Sharded variant of get_or_create_vector_store: one independent index per source PDF.
+    A changed or deleted PDF only rewrites (or removes) its own shard, for any index type.
+    """
+    if usable:
+        added, changed, removed = diff_sources(manifest, source_hashes)
+        changed = _with_dependents(manifest, changed, removed)
+        unchanged = [file for file, entry in manifest["files"].items()
+                     if file not in changed and file not in removed and entry["chunk_ids"]]
+        print("Sharded vector store found. Loading shards from disk...")
+        sharded_store = load_sharded_store(vector_store_path, embeddings, [shard_name(file) for file in unchanged], config)
+    else:
+        print("Building sharded knowledge base from scratch...")
+        shutil.rmtree(os.path.join(vector_store_path, SHARDS_DIRNAME), ignore_errors=True)
+        manifest = new_manifest(config['gemini']['embedding_model'], _build_settings(config.get('vector_store', {})))
+        added, changed, removed = sorted(source_hashes), [], []
+        sharded_store = load_sharded_store(vector_store_path, embeddings, [], config)
+
+    if changed or removed:
+        print(f"Source changes detected: {len(added)} added, {len(changed)} changed, {len(removed)} removed.")
+    stale_ids = [chunk_id for file in changed + removed for chunk_id in manifest["files"][file]["chunk_ids"]]
+    for file in changed + removed:
+        delete_shard(vector_store_path, shard_name(file))
+    for file in removed:
+        del manifest["files"][file]
+
+    to_build = sorted(added + changed)
+    docs, chunk_ids = [], []
+    if to_build:
+        docs, chunk_ids, chunk_ids_by_file = _build_shards(sharded_store, config, vector_store_path, pdf_path,
+                                                           source_hashes, to_build, embeddings)
+        _record_sources(manifest, to_build, source_hashes, chunk_ids_by_file, docs)
+
+    if not sharded_store.shards:
+        print("ERROR: No documents were loaded to build the knowledge base.")
+        return None
+
+    lexical_path = os.path.join(vector_store_path, LEXICAL_INDEX_FILENAME)
+    if to_build or removed or not os.path.exists(lexical_path):
+        if usable:
+            _update_lexical_index(sharded_store, vector_store_path, stale_ids, docs, chunk_ids)
+        else:
+            _build_lexical_index(sharded_store, vector_store_path)
+        save_manifest(vector_store_path, manifest)
+        _report_embedding_cache(embeddings)
+    print(f"Sharded vector store ready with {len(sharded_store.shards)} shards.")
+    return sharded_store
+
+
+def _is_usable(manifest: dict | None, vector_store_path: str, embedding_model: str, settings: dict) -> bool:
+    """Whether an existing store was built with the current embedding model and build settings."""
+    return (
+        os.path.exists(vector_store_path) and manifest is not None
+        and manifest.get("embedding_model") == embedding_model
+        and manifest.get("index") == settings
+    )
+
+
+def _get_or_create_at(config: dict, vector_store_path: str, source_hashes: dict[str, str], embeddings):
+    """Loads, incrementally updates or builds the knowledge base stored in vector_store_path."""
+    pdf_path = os.path.join(PROJECT_ROOT, config['data']['pdf_path'])
+    vector_store_config = config.get('vector_store', {})
+    settings = _build_settings(vector_store_config)
+    manifest = load_manifest(vector_store_path)
+    usable = _is_usable(manifest, vector_store_path, config['gemini']['embedding_model'], settings)
+    
+    if settings["sharding"] == "source":
+        return _get_or_create_sharded_store(config, vector_store_path, pdf_path, source_hashes,
+                                            manifest, usable, embeddings)
     
     # --- 1. Check if store exists, and load it ---
-    if os.path.exists(vector_store_path):
-        print("Vector store found. Loading from disk...")
-        embeddings = GoogleGenerativeAIEmbeddings(model=config['gemini']['embedding_model'], google_api_key=api_key)
-        vector_store = FAISS.load_local(
-            vector_store_path, 
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
-        print("Vector store loaded successfully.")
-        return vector_store
+    if usable:
+        added, changed, removed = diff_sources(manifest, source_hashes)
+        if not (added or changed or removed):
+            print("Vector store found. Loading from disk...")
+            # Memory-mapped index with a lazily read docstore
+            vector_store = load_vector_store(vector_store_path, embeddings, mmap=True)
+            apply_search_params(vector_store.index, vector_store_config)
+            if not os.path.exists(os.path.join(vector_store_path, LEXICAL_INDEX_FILENAME)):
+                # Stores built before the lexical index existed get one on first load
+                _build_lexical_index(vector_store, vector_store_path)
+            print("Vector store loaded successfully.")
+            return vector_store
+
+        changed = _with_dependents(manifest, changed, removed)
+        print(f"Source changes detected: {len(added)} added, {len(changed)} changed, {len(removed)} removed.")
+        if supports_incremental_updates(settings):
+            vector_store = load_vector_store(vector_store_path, embeddings, mmap=False)
+            apply_search_params(vector_store.index, vector_store_config)
+            return _update_vector_store(vector_store, manifest, config, vector_store_path, pdf_path,
+                                        source_hashes, added, changed, removed, embeddings)
+        # Graph and re-ranked indexes can't drop vectors; rebuild, re-using cached embeddings for unchanged chunks
+        print(f"This '{settings['index_type']}' index can't be updated in place. Rebuilding...")
+        return _build_vector_store(config, vector_store_path, pdf_path, source_hashes, embeddings)
 
-    # --- 2. If it doesn't exist, build it ---
+    # --- 2. If it doesn't exist (or can't be diffed), build it ---
     else:
         # UI messages like st.info() are now handled by the calling script (app.py)
-        print("Knowledge base not found. Triggering build process...")
-        
-        pdf_path = os.path.join(PROJECT_ROOT, config['data']['pdf_path'])
-        documents = load_and_process_pdfs(pdf_path, config)
-        if not documents:
-            # Error messages are now simple prints; app.py will show the st.error()
-            print("ERROR: No documents were loaded to build the knowledge base.")
-            return None
-
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=300)
-        docs = text_splitter.split_documents(documents)
-        
-        embeddings = GoogleGenerativeAIEmbeddings(model=config['gemini']['embedding_model'], google_api_key=api_key)
-        
-        print("Building and saving FAISS vector store...")
-        vector_store = FAISS.from_documents(docs, embeddings)
-        vector_store.save_local(vector_store_path)
-        print(f"Knowledge base built and saved successfully at {vector_store_path}")
-        # Return the newly created object directly from memory
+        if os.path.exists(os.path.join(vector_store_path, MANIFEST_FILENAME)):
+            print("Vector store has no usable build manifest (or its settings changed). Rebuilding from scratch...")
+        else:
+            print("Knowledge base not found. Triggering build process...")
+        return _build_vector_store(config, vector_store_path, pdf_path, source_hashes, embeddings)
+
+
+def _snapshots_enabled(config: dict) -> bool:
+    return bool(config.get('vector_store', {}).get('snapshots', False))
+
+
+def resolve_vector_store_path(config: dict) -> str:
+    """The directory holding the live knowledge base: the current snapshot when snapshots are enabled."""
+    root = os.path.join(PROJECT_ROOT, config['data']['vector_store_path'])
+    if _snapshots_enabled(config):
+        version = current_snapshot(root)
+        if version is not None:
+            return snapshot_path(root, version)
+    return root
+
+
+def load_knowledge_base(config: dict, vector_store_path: str):
+    """Opens an already built knowledge base read-only, without checking the sources (used for hot-swaps)."""
+    embeddings = get_embeddings(config, PROJECT_ROOT)
+    vector_store_config = config.get('vector_store', {})
+    if index_settings(vector_store_config)["sharding"] == "source":
+        manifest = load_manifest(vector_store_path)
+        names = [shard_name(file) for file, entry in manifest["files"].items() if entry["chunk_ids"]]
+        return load_sharded_store(vector_store_path, embeddings, names, config)
+    vector_store = load_vector_store(vector_store_path, embeddings, mmap=True)
+    apply_search_params(vector_store.index, vector_store_config)
+    return vector_store
+
+
+def get_or_create_vector_store(config: dict):
+    """
+    Checks if the vector store exists. If so, loads it and incrementally applies any changes
+    to the source PDFs recorded in its build manifest.
+    If not, builds it, saves it, and returns the store object directly from memory.
+    With 'vector_store.snapshots' enabled, every change is built into a new immutable
+    snapshot directory that is only published (via the CURRENT pointer) once complete.
+    This function is now completely decoupled from Streamlit.
+    """
+    root = os.path.join(PROJECT_ROOT, config['data']['vector_store_path'])
+    pdf_path = os.path.join(PROJECT_ROOT, config['data']['pdf_path'])
+    embeddings = get_embeddings(config, PROJECT_ROOT)
+    # Only files whose mtime or size moved since the last build are read and hashed
+    source_hashes, signatures = hash_sources(pdf_path, list_pdf_files(pdf_path),
+                                             load_manifest(resolve_vector_store_path(config)))
+
+    if not _snapshots_enabled(config):
+        vector_store = _get_or_create_at(config, root, source_hashes, embeddings)
+        if vector_store is not None:
+            record_signatures(root, source_hashes, signatures)
         return vector_store
 
+    vector_store_config = config.get('vector_store', {})
+    current = current_snapshot(root)
+    base_version = None
+    if current is not None:
+        current_path = snapshot_path(root, current)
+        manifest = load_manifest(current_path)
+        settings = _build_settings(vector_store_config)
+        if _is_usable(manifest, current_path, config['gemini']['embedding_model'], settings):
+            if diff_sources(manifest, source_hashes) == ([], [], []):
+                print(f"Using knowledge base snapshot {current}.")
+                vector_store = _get_or_create_at(config, current_path, source_hashes, embeddings)
+                if vector_store is not None:
+                    # Only the manifest's stat cache changes; the snapshot's content stays as published
+                    record_signatures(current_path, source_hashes, signatures)
+                return vector_store
+            base_version = current
+
+    # Build the change into a fresh copy (or an empty directory) so the published snapshot stays untouched
+    version, staging_path = stage_snapshot(root, base_version)
+    try:
+        vector_store = _get_or_create_at(config, staging_path, source_hashes, embeddings)
+    except Exception:
+        discard_snapshot(root, version)
+        raise
+    if vector_store is None:
+        discard_snapshot(root, version)
+        return None
+    record_signatures(staging_path, source_hashes, signatures)
+    publish_snapshot(root, version)
+    collect_garbage(root, int(vector_store_config.get('snapshot_retention', 3)))
+    return vector_store
+
 # This block allows you to still run this script directly from the command line for local building
 if __name__ == '__main__':
     # When run directly, it loads its own config from the standard path
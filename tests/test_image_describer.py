@@ -0,0 +1,105 @@
+# tests/test_image_describer.py
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("google.generativeai")
+pytest.importorskip("streamlit")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ingestion import image_describer
+from src.ingestion.image_describer import ImageDescriber, stub_describe_fn
+
+
+def _images(count: int) -> list[tuple[bytes, str]]:
+    return [(f"image-{i}".encode(), "image/png") for i in range(count)]
+
+
+class CountingFn:
+    """Wraps the stub, recording calls and optionally failing the first few."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, image_bytes: bytes, mime_type: str) -> str:
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            fail = self.calls <= self.failures
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if fail:
+                raise RuntimeError("quota exceeded")
+            return stub_describe_fn(image_bytes, mime_type)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_concurrent_calls_are_bounded():
+    fn = CountingFn(delay=0.05)
+    describer = ImageDescriber(fn, max_concurrency=2, requests_per_second=0)
+    describer.describe_many(_images(8))
+    assert fn.calls == 8
+    assert fn.peak == 2
+
+
+def test_failed_calls_are_retried_with_exponential_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(image_describer.time, "sleep", delays.append)
+    fn = CountingFn(failures=2)
+    describer = ImageDescriber(fn, requests_per_second=0, max_retries=3, backoff_seconds=1.0)
+
+    [description] = describer.describe_many(_images(1))
+
+    assert description == f"[Image Description: {stub_describe_fn(*_images(1)[0])}]"
+    assert fn.calls == 3
+    assert (describer.described, describer.failed) == (1, 0)
+    assert len(delays) == 2
+    assert 1.0 <= delays[0] <= 1.25
+    assert 2.0 <= delays[1] <= 2.5
+
+
+def test_permanent_failure_returns_error_text():
+    fn = CountingFn(failures=100)
+    describer = ImageDescriber(fn, requests_per_second=0, max_retries=2, backoff_seconds=0)
+
+    [description] = describer.describe_many(_images(1))
+
+    assert description.startswith("[Image Description: Error processing image - quota exceeded")
+    assert fn.calls == 3
+    assert (describer.described, describer.failed) == (0, 1)
+
+
+def test_describe_many_preserves_input_order():
+    images = _images(12)
+    describer = ImageDescriber(CountingFn(delay=0.01), max_concurrency=4, requests_per_second=0)
+    descriptions = describer.describe_many(images)
+    assert descriptions == [f"[Image Description: {stub_describe_fn(*image)}]" for image in images]
+
+
+def test_identical_images_are_described_once():
+    a, b = _images(2)
+    fn = CountingFn()
+    describer = ImageDescriber(fn, requests_per_second=0)
+
+    first = describer.describe_many([a, b, a, a])
+    second = describer.describe_many([(a[0], "image/png")])
+
+    assert fn.calls == 2
+    assert first[0] == first[2] == first[3] == second[0]
+    assert first[1] != first[0]
+    assert "3 reused" in describer.report()
@@ -0,0 +1,34 @@
+# tests/test_sharded_store.py
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.vector_store.sharded_store import ShardedVectorStore, shard_name
+
+
+def test_from_texts_and_add_texts_route_by_source():
+    embeddings = DeterministicFakeEmbedding(size=32)
+    texts = [f"chunk {i}" for i in range(12)]
+    store = ShardedVectorStore.from_texts(texts, embeddings, [{'source': f"manual{i % 3}.pdf"} for i in range(12)])
+    assert sorted(store.shards) == sorted(shard_name(f"manual{i}.pdf") for i in range(3))
+
+    ids = store.add_texts(["a brand new chunk"], [{'source': "new.pdf"}])
+    assert shard_name("new.pdf") in store.shards
+    assert store.docstore.search(ids[0]).page_content == "a brand new chunk"
+    assert store.similarity_search("chunk 7", k=1)[0].page_content == "chunk 7"
+
+
+def test_closed_store_still_answers_searches():
+    embeddings = DeterministicFakeEmbedding(size=32)
+    store = ShardedVectorStore.from_texts(["alpha", "beta"], embeddings, [{'source': "a.pdf"}, {'source': "b.pdf"}])
+    store.close()
+    assert store.similarity_search("beta", k=1)[0].page_content == "beta"